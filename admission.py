@@ -0,0 +1,161 @@
+"""
+Admission Control
+Per-route concurrency limits with bounded queues and fail-fast load shedding
+"""
+
+import math
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from flask import g, jsonify, request
+
+
+class ConcurrencyLimiter:
+    """
+    Admits at most `max_concurrent` requests; up to `max_queue` more may wait
+    for `max_queue_time` seconds, everything beyond that is rejected at once
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int = 0, max_queue_time: float = 0.1):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_queue_time = max_queue_time
+
+        self._cond = threading.Condition()
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def acquire(self) -> bool:
+        """Take a slot, waiting in the queue if allowed; False means shed the request"""
+        with self._cond:
+            if self.active < self.max_concurrent and self.queued == 0:
+                self.active += 1
+                self.admitted += 1
+                return True
+            if self.queued >= self.max_queue:
+                self.rejected_queue_full += 1
+                return False
+
+            self.queued += 1
+            started = time.monotonic()
+            deadline = started + self.max_queue_time
+            try:
+                while self.active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected_timeout += 1
+                        return False
+                    self._cond.wait(remaining)
+            finally:
+                self.queued -= 1
+
+            waited = time.monotonic() - started
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            self.active += 1
+            self.admitted += 1
+            return True
+
+    def release(self) -> None:
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def stats(self) -> Dict:
+        return {
+            'max_concurrent': self.max_concurrent,
+            'max_queue': self.max_queue,
+            'max_queue_ms': self.max_queue_time * 1000,
+            'active': self.active,
+            'queue_depth': self.queued,
+            'admitted': self.admitted,
+            'rejected_queue_full': self.rejected_queue_full,
+            'rejected_timeout': self.rejected_timeout,
+            'avg_wait_ms': round(self.total_wait_seconds / self.admitted * 1000, 3) if self.admitted else 0.0,
+            'max_wait_ms': round(self.max_wait_seconds * 1000, 3),
+        }
+
+
+class AdmissionControl:
+    """
+    Flask extension applying a ConcurrencyLimiter to each route
+
+    Requests waiting in a route's queue hold a server thread just like
+    admitted ones, so the server needs more threads than thread_demand()
+    for exempt routes such as /health, which are never queued or counted,
+    to be served while upstream calls are slow. Shed requests get 503 with
+    a Retry-After header.
+    """
+
+    def __init__(self, app=None, limits: Dict[str, int] = None, default_limit: int = 16,
+                 max_queue: int = 32, max_queue_time: float = 0.1, retry_after: int = 1,
+                 exempt: Iterable[str] = ('health_check', 'metrics', 'static')):
+        self.limits = limits or {}
+        self.default_limit = default_limit
+        self.max_queue = max_queue
+        self.max_queue_time = max_queue_time
+        self.retry_after = retry_after
+        self.exempt = set(exempt)
+        self.limiters: Dict[str, ConcurrencyLimiter] = {}
+        self._lock = threading.Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        app.before_request(self._admit)
+        app.teardown_request(self._release)
+        app.extensions['admission_control'] = self
+
+    def limiter_for(self, endpoint: str) -> Optional[ConcurrencyLimiter]:
+        if endpoint is None or endpoint in self.exempt:
+            return None
+        limiter = self.limiters.get(endpoint)
+        if limiter is None:
+            with self._lock:
+                limiter = self.limiters.setdefault(endpoint, ConcurrencyLimiter(
+                    self.limits.get(endpoint, self.default_limit),
+                    max_queue=self.max_queue,
+                    max_queue_time=self.max_queue_time
+                ))
+        return limiter
+
+    def thread_demand(self, endpoints: Iterable[str]) -> int:
+        """Most threads these endpoints' admitted and queued requests can hold at once"""
+        return sum(self.limits.get(endpoint, self.default_limit) + self.max_queue
+                   for endpoint in set(endpoints) - self.exempt)
+
+    def _admit(self):
+        limiter = self.limiter_for(request.endpoint)
+        if limiter is None:
+            return None
+        if not limiter.acquire():
+            response = jsonify({'error': 'Server is busy, please retry shortly'})
+            response.status_code = 503
+            response.headers['Retry-After'] = str(max(1, math.ceil(self.retry_after)))
+            return response
+        g.admission_limiter = limiter
+        return None
+
+    def _release(self, exc=None) -> None:
+        limiter = g.pop('admission_limiter', None)
+        if limiter is not None:
+            limiter.release()
+
+    def stats(self) -> Dict:
+        return {endpoint: limiter.stats() for endpoint, limiter in self.limiters.items()}
+
+
+def parse_limits(spec: str) -> Dict[str, int]:
+    """Parse "lookup_bin=16,get_ranges=4" into {endpoint: limit}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in (spec or '').split(','))):
+        endpoint, _, value = item.partition('=')
+        limits[endpoint.strip()] = int(value)
+    return limits
@@ -2,44 +2,105 @@
 Flask Web Application for Mastercard BIN Lookup
 """
 
-from flask import Flask, render_template, request, jsonify, flash
+from warmup import StartupTimer
+
+# Created first so the imports below are included in the startup report
+startup_timer = StartupTimer()
+
+with startup_timer.phase('import_flask'):
+    from flask import Flask, Response, current_app, render_template, request, jsonify, flash, stream_with_context
+from itertools import chain
+import hmac
 import os
+import time
 from dotenv import load_dotenv
-from bin_lookup_client import create_bin_client, BINValidator
+with startup_timer.phase('import_client'):
+    # Pulls in requests, cryptography and numpy
+    from bin_lookup_client import create_bin_client, BINValidator
+from admission import AdmissionControl
+from range_export import EXPORT_FORMATS, gzip_chunks, iter_csv, iter_ndjson
+from services import LookupServices, load_config
 import logging
 
 # Load environment variables
 load_dotenv()
 
-app = Flask(__name__)
-app.secret_key = os.getenv('FLASK_SECRET_KEY', 'your-secret-key-here')
-
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize BIN client (will be created when needed)
-bin_client = None
+
+def create_app(config: dict = None) -> Flask:
+    """
+    Build the Flask app
+
+    Args:
+        config: Settings overriding the environment (keys as in services.load_config,
+                plus BIN_CLIENT_FACTORY to supply the BIN client)
+
+    With WORKER_INIT=post_fork, per-process state is left for the server's
+    post-fork hook (see gunicorn.conf.py). Otherwise it is created here, and
+    a process forked from this one re-creates it on its first request.
+    """
+    app = Flask(__name__)
+    app.config.update(load_config())
+    app.config.update(config or {})
+    app.secret_key = app.config['SECRET_KEY']
+
+    # Per-route concurrency limits; excess requests queue briefly, then get 503
+    if app.config['ADMISSION_CONTROL']:
+        AdmissionControl(
+            app,
+            limits=app.config['ADMISSION_LIMITS'],
+            default_limit=app.config['ADMISSION_DEFAULT_LIMIT'],
+            max_queue=app.config['ADMISSION_MAX_QUEUE'],
+            max_queue_time=app.config['ADMISSION_MAX_QUEUE_MS'] / 1000,
+            retry_after=app.config['ADMISSION_RETRY_AFTER']
+        )
+
+    services = LookupServices(app.config, app.config.get('BIN_CLIENT_FACTORY', create_bin_client),
+                              timer=startup_timer)
+    app.extensions['bin_lookup'] = services
+    services.load_shared()
+    if app.config['WORKER_INIT'] != 'post_fork':
+        services.start_worker()
+        app.before_request(services.start_worker)
+
+    app.add_url_rule('/', view_func=index)
+    app.add_url_rule('/lookup', view_func=lookup_bin, methods=['POST'])
+    app.add_url_rule('/ranges', view_func=get_ranges)
+    app.add_url_rule('/ranges/export', view_func=export_ranges)
+    app.add_url_rule('/search', view_func=search_bins)
+    app.add_url_rule('/suggest', view_func=suggest_bins)
+    app.add_url_rule('/stats', view_func=range_statistics)
+    app.add_url_rule('/cache/flush', view_func=flush_cache, methods=['POST'])
+    app.add_url_rule('/health', view_func=health_check)
+    app.add_url_rule('/metrics', view_func=metrics)
+    app.register_error_handler(404, not_found)
+    app.register_error_handler(500, internal_error)
+    return app
+
+
+def get_services() -> LookupServices:
+    """Lookup state of the app handling the current request"""
+    return current_app.extensions['bin_lookup']
+
 
 def get_bin_client():
     """Get or create BIN client instance"""
-    global bin_client
-    if bin_client is None:
-        try:
-            bin_client = create_bin_client()
-        except Exception as e:
-            logger.error(f"Failed to create BIN client: {e}")
-            raise
-    return bin_client
+    return get_services().get_bin_client()
+
+
+def get_lookup_backend():
+    """Return the object /lookup resolves BINs through (client or micro-batcher)"""
+    return get_services().get_lookup_backend()
 
 
-@app.route('/')
 def index():
     """Main page with BIN lookup form"""
     return render_template('index.html')
 
 
-@app.route('/lookup', methods=['POST'])
 def lookup_bin():
     """Handle BIN lookup requests"""
     try:
@@ -55,10 +116,18 @@ def lookup_bin():
         
         # Clean BIN number
         clean_bin = BINValidator.clean_bin(bin_number)
+        # A clear bit means no range covers the BIN, so skip the signed upstream call
+        coverage = get_services().warmup.coverage
+        if coverage is not None and not coverage.covers(clean_bin):
+            return jsonify({'error': 'No account range covers this BIN', 'bin_number': clean_bin}), 404
+
+        hot_set = get_services().hot_set
+        if hot_set is not None:
+            hot_set.record(clean_bin)
         
         # Get BIN client and perform lookup
-        client = get_bin_client()
-        result = client.lookup_bin(clean_bin)
+        backend = get_lookup_backend()
+        result = backend.lookup_bin(clean_bin)
         
         return jsonify({
             'success': True,
@@ -73,7 +142,6 @@ def lookup_bin():
         return jsonify({'error': 'An error occurred during BIN lookup'}), 500
 
 
-@app.route('/ranges')
 def get_ranges():
     """Get account ranges with pagination"""
     try:
@@ -100,7 +168,47 @@ def get_ranges():
         return jsonify({'error': 'Failed to retrieve account ranges'}), 500
 
 
-@app.route('/search')
+def export_ranges():
+    """Stream every account range as NDJSON or CSV"""
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f"Unsupported format. Use one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+    try:
+        # Serve from the warm-up snapshot when loaded, otherwise stream upstream pages
+        range_table = get_services().warmup.range_table
+        if range_table is not None:
+            source = 'snapshot'
+            ranges = range_table.to_dicts()
+        else:
+            source = 'upstream'
+            ranges = get_bin_client().iter_account_ranges()
+
+        if export_format == 'csv':
+            fields = request.args.get('fields')
+            chunks = iter_csv(ranges, fields.split(',')) if fields else iter_csv(ranges)
+        else:
+            chunks = iter_ndjson(ranges)
+
+        # Produce the first chunk now so upstream failures still get a proper error status
+        first = next(chunks, b'')
+    except Exception as e:
+        logger.error(f"Account range export error: {e}")
+        return jsonify({'error': 'Failed to export account ranges'}), 500
+
+    headers = {
+        'Content-Disposition': f'attachment; filename=bin-ranges.{export_format}',
+        'X-Range-Source': source,
+        'Vary': 'Accept-Encoding',
+    }
+    body = chain([first], chunks)
+    if 'gzip' in request.accept_encodings:
+        body = gzip_chunks(body)
+        headers['Content-Encoding'] = 'gzip'
+
+    return Response(stream_with_context(body), mimetype=EXPORT_FORMATS[export_format], headers=headers)
+
+
 def search_bins():
     """Search BINs based on criteria"""
     try:
@@ -129,24 +237,93 @@ def search_bins():
         return jsonify({'error': 'Failed to search BINs'}), 500
 
 
-@app.route('/health')
+def suggest_bins():
+    """As-you-type suggestions: ranges and top issuers for a partly typed BIN"""
+    prefix = request.args.get('prefix', '').strip()
+    if not prefix.isdigit() or not 2 <= len(prefix) <= 8:
+        return jsonify({'error': 'Prefix must be 2-8 digits'}), 400
+    limit = min(max(request.args.get('limit', current_app.config['SUGGEST_LIMIT'], type=int), 1), 25)
+
+    suggester = get_services().warmup.range_suggester
+    if suggester is None:
+        return jsonify({'error': 'Suggestions need a range snapshot (BIN_RANGE_SNAPSHOT)'}), 503
+
+    started = time.perf_counter()
+    result = suggester.suggest(prefix, limit)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    response = jsonify({'success': True, 'data': result})
+    # Answers only change with the snapshot, so browsers and proxies may reuse them
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['SUGGEST_MAX_AGE']
+    response.set_etag(f"{suggester.generation}-{prefix}-{limit}")
+    response.headers['Server-Timing'] = f"suggest;dur={elapsed_ms:.3f}"
+    return response.make_conditional(request)
+
+
+def range_statistics():
+    """Range counts and BIN-space coverage by country, product type and issuer"""
+    stats = get_services().warmup.range_stats
+    if stats is None:
+        return jsonify({'error': 'Statistics need a range snapshot (BIN_RANGE_SNAPSHOT)'}), 503
+
+    # Pre-rendered when the ranges change; ?issuers=all adds the full per-issuer breakdown
+    etag, body = stats.body(include_issuers=request.args.get('issuers') == 'all')
+    response = Response(body, mimetype='application/json')
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['STATS_MAX_AGE']
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+
+def flush_cache():
+    """Clear the lookup cache and re-prewarm the hot set; needs CACHE_FLUSH_TOKEN"""
+    token = current_app.config['CACHE_FLUSH_TOKEN']
+    if not token:
+        return jsonify({'error': 'Cache flush is disabled (set CACHE_FLUSH_TOKEN)'}), 404
+    scheme, _, supplied = request.headers.get('Authorization', '').partition(' ')
+    if scheme != 'Bearer':
+        supplied = ''
+    if not hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8')):
+        return jsonify({'error': 'Invalid flush token'}), 403
+
+    try:
+        return jsonify({'success': True, **get_services().flush_cache()})
+    except Exception as e:
+        logger.error(f"Cache flush failed: {e}")
+        return jsonify({'error': 'Cache flush failed'}), 500
+
+
 def health_check():
     """Health check endpoint"""
+    warmup = get_services().warmup
+    # Report unready until boot-time warm-up has finished
+    if warmup.started and not warmup.ready:
+        status = 'unhealthy' if warmup.error else 'starting'
+        return jsonify({'status': status, 'warmup': warmup.status()}), 503
+
     try:
         # Test if we can create a client (validates configuration)
         get_bin_client()
-        return jsonify({'status': 'healthy', 'message': 'API is ready'})
+        return jsonify({'status': 'healthy', 'message': 'API is ready', 'warmup': warmup.status()})
     except Exception as e:
         return jsonify({'status': 'unhealthy', 'error': str(e)}), 503
 
 
-@app.errorhandler(404)
+def metrics():
+    """Runtime metrics for lookup batching, admission control and upstreams"""
+    admission = current_app.extensions.get('admission_control')
+    return jsonify({
+        **get_services().stats(),
+        'admission': admission.stats() if admission is not None else None
+    })
+
+
 def not_found(error):
     """Handle 404 errors"""
     return render_template('404.html'), 404
 
 
-@app.errorhandler(500)
 def internal_error(error):
     """Handle 500 errors"""
     return render_template('500.html'), 500
@@ -167,6 +344,7 @@ if __name__ == '__main__':
         exit(1)
     
     # Run the application
+    app = create_app()
     debug_mode = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
     port = int(os.getenv('PORT', 5000))
     
@@ -0,0 +1,168 @@
+"""
+Lookup Micro-Batching
+Coalesces concurrent cache-missing BIN lookups into bulk upstream resolutions
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Sequence
+
+from bin_lookup_client import BINLookupClient
+
+
+class MicroBatcher:
+    """
+    Collects keys for up to `max_delay` seconds or `max_batch` items, then
+    resolves them with one call to `resolve_batch`
+
+    resolve_batch receives the distinct keys of a batch and returns a dict
+    mapping each key to its result or to an exception; every caller waiting
+    on that key gets the same outcome. Batches are dispatched to a small pool
+    so collection continues while earlier batches are in flight.
+    """
+
+    def __init__(self, resolve_batch: Callable[[Sequence[str]], Dict[str, Any]],
+                 max_batch: int = 32, max_delay: float = 0.005, max_in_flight: int = 4):
+        self.resolve_batch = resolve_batch
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_in_flight = max_in_flight
+
+        self._cond = threading.Condition()
+        self._pending: Dict[str, List[Future]] = {}
+        self._enqueued_at: Dict[str, float] = {}
+        # Keys whose batch is already resolving; late callers join those waiters
+        self._in_flight: Dict[str, List[Future]] = {}
+        self._collector = None
+        self._executor = None
+        self._pid = None
+
+        self.batches = 0
+        self.items = 0
+        self.requests = 0
+        self.largest_batch = 0
+        self.total_queue_seconds = 0.0
+        self.max_queue_seconds = 0.0
+        self.total_resolve_seconds = 0.0
+
+    def _ensure_started(self) -> None:
+        # Threads do not survive fork, so each worker process starts its own
+        if self._collector is not None and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._pending = {}
+        self._enqueued_at = {}
+        self._in_flight = {}
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight,
+                                            thread_name_prefix='bin-batch')
+        self._collector = threading.Thread(target=self._collect, name='bin-batch-collector',
+                                           daemon=True)
+        self._collector.start()
+
+    def submit(self, key: str) -> Future:
+        """Queue key for the next batch; duplicates within a window share one resolution"""
+        future = Future()
+        with self._cond:
+            self._ensure_started()
+            self.requests += 1
+            waiters = self._in_flight.get(key) or self._pending.get(key)
+            if waiters is None:
+                self._pending[key] = [future]
+                self._enqueued_at[key] = time.monotonic()
+                self._cond.notify()
+            else:
+                waiters.append(future)
+        return future
+
+    def lookup(self, key: str, timeout: float = 30) -> Any:
+        """Submit key and wait for its result, re-raising its exception"""
+        return self.submit(key).result(timeout=timeout)
+
+    def _collect(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+
+                # Wait for the window opened by the oldest key, or a full batch
+                deadline = min(self._enqueued_at.values()) + self.max_delay
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                keys = list(self._pending)[:self.max_batch]
+                batch = {key: self._pending.pop(key) for key in keys}
+                enqueued = {key: self._enqueued_at.pop(key) for key in keys}
+                self._in_flight.update(batch)
+
+            now = time.monotonic()
+            waited = max(now - started for started in enqueued.values())
+            self.batches += 1
+            self.items += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            self.total_queue_seconds += sum(now - started for started in enqueued.values())
+            self.max_queue_seconds = max(self.max_queue_seconds, waited)
+            try:
+                self._executor.submit(self._resolve, batch)
+            except Exception as e:
+                # e.g. the pool was shut down at interpreter exit: fail this batch, keep collecting
+                self._complete(batch, {key: e for key in batch})
+
+    def _resolve(self, batch: Dict[str, List[Future]]) -> None:
+        started = time.monotonic()
+        try:
+            results = self.resolve_batch(list(batch))
+        except Exception as e:
+            results = {key: e for key in batch}
+        self.total_resolve_seconds += time.monotonic() - started
+        self._complete(batch, results)
+
+    def _complete(self, batch: Dict[str, List[Future]], results: Dict[str, Any]) -> None:
+        """Hand every waiter its key's result or exception"""
+        with self._cond:
+            for key in batch:
+                self._in_flight.pop(key, None)
+
+        for key, waiters in batch.items():
+            outcome = results.get(key, KeyError(key))
+            for future in waiters:
+                if isinstance(outcome, Exception):
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch size and queueing delay measurements"""
+        return {
+            'max_batch': self.max_batch,
+            'max_delay_ms': self.max_delay * 1000,
+            'requests': self.requests,
+            'batches': self.batches,
+            'items': self.items,
+            'queued': len(self._pending),
+            'largest_batch': self.largest_batch,
+            'avg_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+            'avg_queue_ms': round(self.total_queue_seconds / self.items * 1000, 3) if self.items else 0.0,
+            'max_queue_ms': round(self.max_queue_seconds * 1000, 3),
+            'avg_resolve_ms': round(self.total_resolve_seconds / self.batches * 1000, 3) if self.batches else 0.0,
+        }
+
+
+class BatchingLookup:
+    """Serves cached BINs directly and micro-batches the cache misses"""
+
+    def __init__(self, client: BINLookupClient, max_batch: int = 32, max_delay: float = 0.005):
+        self.client = client
+        self.batcher = MicroBatcher(client.lookup_bins, max_batch=max_batch, max_delay=max_delay)
+
+    def lookup_bin(self, bin_number: str, timeout: float = 30) -> Dict:
+        if self.client.is_cached(bin_number):
+            return self.client.lookup_bin(bin_number)
+        return self.batcher.lookup(bin_number, timeout=timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.batcher.stats()
@@ -0,0 +1,74 @@
+"""
+Range Snapshot Benchmark
+Compares rebuilding the range table from JSON pages with loading a columnar snapshot
+
+Usage:
+    python benchmark_snapshot.py --rows 2000000
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from bin_ranges import BINRangeTable
+
+COUNTRIES = ['USA', 'GBR', 'DEU', 'FRA', 'CAN', 'BRA', 'IND', 'JPN', 'AUS', 'MEX']
+PRODUCTS = ['CREDIT', 'DEBIT', 'PREPAID']
+
+
+def make_pages(rows: int, page_size: int, seed: int = 7):
+    """Serialized /bin-ranges pages holding `rows` synthetic 8-digit ranges"""
+    rng = random.Random(seed)
+    issuers = [f"Issuer {i}" for i in range(max(1, rows // 200))]
+    pages = []
+    for start in range(0, rows, page_size):
+        content = []
+        for i in range(start, min(start + page_size, rows)):
+            prefix = 10000000 + i * 8
+            content.append({
+                'lowAccountRange': f"{prefix}00000000",
+                'highAccountRange': f"{prefix}99999999",
+                'issuerName': rng.choice(issuers),
+                'countryCode': rng.choice(COUNTRIES),
+                'productType': rng.choice(PRODUCTS),
+                'cardType': 'MASTERCARD',
+            })
+        pages.append(json.dumps({'content': content, 'last': start + page_size >= rows}).encode('utf-8'))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=2000000)
+    parser.add_argument('--page-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    pages = make_pages(args.rows, args.page_size)
+    print(f"{args.rows} ranges in {len(pages)} pages, {sum(map(len, pages)) / 1e6:.1f} MB of JSON")
+
+    start = time.perf_counter()
+    table = BINRangeTable()
+    for page in pages:
+        table.extend(json.loads(page)['content'])
+    rebuild = time.perf_counter() - start
+    print(f"rebuild from JSON pages: {rebuild:.3f}s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'ranges.brt')
+        start = time.perf_counter()
+        size = table.save(path)
+        print(f"save snapshot:           {time.perf_counter() - start:.3f}s ({size / 1e6:.1f} MB)")
+
+        start = time.perf_counter()
+        loaded = BINRangeTable.load(path)
+        load = time.perf_counter() - start
+        print(f"load snapshot:           {load:.3f}s ({rebuild / load:.0f}x faster)")
+
+    assert len(loaded) == len(table) and loaded.row_dict(len(table) - 1) == table.row_dict(len(table) - 1)
+
+
+if __name__ == '__main__':
+    main()
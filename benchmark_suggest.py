@@ -0,0 +1,138 @@
+"""
+Suggest Benchmark
+Measures /suggest latency while many users type BINs at keystroke rate
+
+Usage:
+    # Index timings, then an in-process app serving a snapshot of the same data
+    python benchmark_suggest.py --ranges 200000 --typists 50 --duration 30
+
+    # Against a running server; --ranges and --seed must match its BIN_RANGE_SNAPSHOT
+    python synthetic_ranges.py --count 200000 --output data/ranges.brt
+    BIN_RANGE_SNAPSHOT=data/ranges.brt gunicorn -c gunicorn.conf.py
+    python benchmark_suggest.py --url http://127.0.0.1:5000 --ranges 200000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+import requests
+
+from bin_index import BulkRangeResolver
+from bin_ranges import BINRangeTable
+from loadtest import Recorder, Scenarios, StandInUpstream, create_signing_key, print_summary, start_local_app
+from suggest import RangeSuggester
+from synthetic_ranges import SyntheticRangeGenerator
+
+BUDGET_MS = 5.0
+
+
+def over_budget(recorder: Recorder) -> float:
+    """Share of recorded requests slower than BUDGET_MS"""
+    latencies = [latency for values in recorder.latencies.values() for latency in values]
+    return sum(latency * 1000 > BUDGET_MS for latency in latencies) / len(latencies) if latencies else 0.0
+
+
+def bench_index(table: BINRangeTable, bins, samples: int, seed: int) -> None:
+    """Time building the suggester and answering uncached prefixes of each length"""
+    start = time.perf_counter()
+    suggester = RangeSuggester(BulkRangeResolver(table))
+    print(f"build suggester: {time.perf_counter() - start:.3f}s")
+
+    rng = random.Random(seed)
+    recorder = Recorder()
+    for length in range(2, 9):
+        for _ in range(samples):
+            prefix = rng.choice(bins)[:length]
+            start = time.perf_counter()
+            suggester._suggest(prefix, 10)
+            recorder.record(f"{length}-digit", time.perf_counter() - start, None)
+    print_summary(recorder.summary(1.0))
+    print(f"over {BUDGET_MS}ms budget: {over_budget(recorder):.2%}\n")
+
+
+def bench_http(base_url: str, bins, typists: int, duration: float, keystroke_ms: float,
+               seed: int) -> Recorder:
+    """
+    Each typist picks a BIN and requests /suggest for every prefix from 2 digits
+    up, pausing a jittered keystroke interval between requests
+    """
+    recorder = Recorder()
+    server = Recorder()
+    deadline = time.perf_counter() + duration
+
+    def typist(index: int) -> None:
+        rng = random.Random(seed + index)
+        session = requests.Session()
+        while time.perf_counter() < deadline:
+            bin_number = rng.choice(bins)
+            for length in range(2, len(bin_number) + 1):
+                start = time.perf_counter()
+                error = None
+                try:
+                    response = session.get(f"{base_url}/suggest", params={'prefix': bin_number[:length]},
+                                           timeout=10)
+                    if response.status_code >= 400:
+                        error = str(response.status_code)
+                    timing = response.headers.get('Server-Timing', '').partition('dur=')[2]
+                    if timing:
+                        server.record(f"{length}-digit", float(timing) / 1000, None)
+                except requests.exceptions.RequestException as e:
+                    error = type(e).__name__
+                recorder.record(f"{length}-digit", time.perf_counter() - start, error)
+                time.sleep(keystroke_ms / 1000 * rng.uniform(0.5, 1.5))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=typist, args=(index,), daemon=True) for index in range(typists)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"{typists} typists, {keystroke_ms:.0f}ms between keystrokes, {elapsed:.1f}s:")
+    print_summary(recorder.summary(elapsed))
+    print(f"over {BUDGET_MS}ms budget end to end: {over_budget(recorder):.2%}")
+    print(f"over {BUDGET_MS}ms budget in the handler: {over_budget(server):.2%}")
+    print(f"cache: {requests.get(f'{base_url}/metrics', timeout=10).json().get('suggest_cache')}")
+    return recorder
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', help='app to test; default starts one in-process')
+    parser.add_argument('--ranges', type=int, default=200000, help='synthetic dataset size')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--samples', type=int, default=500, help='uncached prefixes timed per length')
+    parser.add_argument('--typists', type=int, default=50, help='concurrent simulated users')
+    parser.add_argument('--keystroke-ms', type=float, default=150, help='mean pause between keystrokes')
+    parser.add_argument('--duration', type=float, default=30)
+    args = parser.parse_args()
+
+    table = BINRangeTable(SyntheticRangeGenerator(args.ranges, seed=args.seed))
+    bins = Scenarios(table, seed=args.seed).bins
+    print(f"{len(table)} ranges")
+    bench_index(table, bins, args.samples, args.seed)
+
+    if args.url:
+        bench_http(args.url.rstrip('/'), bins, args.typists, args.duration, args.keystroke_ms, args.seed)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot = os.path.join(directory, 'ranges.brt')
+        table.save(snapshot)
+        upstream = StandInUpstream(table).start()
+        base_url, stop_app = start_local_app(upstream.url, create_signing_key(directory),
+                                             {'WARMUP_ON_BOOT': True, 'BIN_RANGE_SNAPSHOT': snapshot})
+        try:
+            bench_http(base_url, bins, args.typists, args.duration, args.keystroke_ms, args.seed)
+        finally:
+            stop_app()
+            upstream.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,776 @@
+"""
+BIN Lookup Result Caches
+Cache tiers consulted by BINLookupClient before calling the Mastercard API
+"""
+
+import abc
+import fcntl
+import hashlib
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from bin_index import prefix_blocks, range_bounds
+from bin_ranges import BINRange, parse_account_range
+
+logger = logging.getLogger(__name__)
+
+# Slot header: seq, key hash, stored_at, expires_at, key length, value length
+_SLOT_HEADER = struct.Struct('<IQddBH')
+_FILE_HEADER = struct.Struct('<8sIII')
+_MAGIC = b'BINCACHE'
+_VERSION = 3
+# Fits the longest range key: "r" + 10-digit generation + ":" + 19-digit low + "+" + 19-digit span
+_KEY_BYTES = 64
+
+
+def _key_hash(key: str) -> int:
+    """Hash that is stable across processes (unlike the built-in hash())"""
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    # 0 marks an empty slot
+    return int.from_bytes(digest, 'little') or 1
+
+
+class BaseCache(abc.ABC):
+    """Common TTL handling and hit/miss accounting for cache tiers"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @abc.abstractmethod
+    def get_entry(self, key: str) -> Optional[Tuple[Dict[str, Any], float, float]]:
+        """
+        Look up key without TTL checks or hit/miss accounting
+
+        Returns:
+            Tuple of (value, stored_at, expires_at), or None if key is missing;
+            expired entries are returned too, so callers can serve them stale
+        """
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value for key, or None if missing or expired"""
+        entry = self.get_entry(key)
+        if entry is None or entry[2] <= time.time():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[0]
+
+    def _expiry(self, ttl: Optional[float], stored_at: Optional[float]):
+        now = time.time()
+        return (now if stored_at is None else stored_at), now + (self.ttl if ttl is None else ttl)
+
+    def _counters(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SharedMemoryCache(BaseCache):
+    """
+    Fixed-size hash table in a memory-mapped file shared by every worker on a host
+
+    The table is set-associative: a key hashes to a bucket of `ways` slots and
+    may live in any of them. Readers take no locks; each slot carries a
+    sequence number that writers make odd while they update it, so a reader
+    that sees an odd or changed number simply retries. Writers lock only the
+    bucket they touch (fcntl byte-range lock across processes plus a
+    process-local lock across threads). When a bucket is full, an expired
+    slot or else the oldest entry is evicted.
+    """
+
+    def __init__(self, path: str, slots: int = 16384, slot_size: int = 1024,
+                 ttl: float = 86400, ways: int = 8):
+        if slot_size <= _SLOT_HEADER.size + _KEY_BYTES:
+            raise ValueError("slot_size too small for cache entries")
+        super().__init__(ttl)
+        self.path = path
+        self.ways = ways
+        self.buckets = max(1, slots // ways)
+        self.slots = self.buckets * ways
+        self.slot_size = slot_size
+        self.max_value_bytes = min(slot_size - _SLOT_HEADER.size - _KEY_BYTES, 0xFFFF)
+        # Entries set() could not store, by what did not fit
+        self.oversize_keys = 0
+        self.oversize_values = 0
+
+        self._data_offset = mmap.PAGESIZE
+        self._size = self._data_offset + self.slots * slot_size
+        self._thread_lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._initialize()
+        self._map = mmap.mmap(self._fd, self._size, mmap.MAP_SHARED)
+
+    def _initialize(self) -> None:
+        """Create or reset the backing file if its geometry does not match ours"""
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, self._data_offset, 0)
+        try:
+            header = os.pread(self._fd, _FILE_HEADER.size, 0)
+            expected = _FILE_HEADER.pack(_MAGIC, _VERSION, self.slots, self.slot_size)
+            if header != expected or os.fstat(self._fd).st_size != self._size:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, self._size)
+                os.pwrite(self._fd, expected, 0)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, self._data_offset, 0)
+
+    def _slot_offset(self, slot: int) -> int:
+        return self._data_offset + slot * self.slot_size
+
+    def _bucket_slots(self, key_hash: int) -> range:
+        first = (key_hash % self.buckets) * self.ways
+        return range(first, first + self.ways)
+
+    def _lock_bucket(self, key_hash: int, operation: int) -> None:
+        first = self._bucket_slots(key_hash).start
+        fcntl.lockf(self._fd, operation, self.ways * self.slot_size, self._slot_offset(first))
+
+    def _read_slot(self, slot: int, key_hash: int, key_bytes: bytes):
+        """Return (value bytes, stored_at, expires_at) if the slot holds the key"""
+        offset = self._slot_offset(slot)
+        for _ in range(8):
+            seq, slot_hash, stored_at, expires_at, key_len, value_len = \
+                _SLOT_HEADER.unpack_from(self._map, offset)
+            if slot_hash != key_hash:
+                return None
+            if seq & 1:
+                continue
+            start = offset + _SLOT_HEADER.size
+            slot_key = self._map[start:start + key_len]
+            value = self._map[start + _KEY_BYTES:start + _KEY_BYTES + value_len]
+            if struct.unpack_from('<I', self._map, offset)[0] != seq:
+                continue
+            return (value, stored_at, expires_at) if slot_key == key_bytes else None
+        return None
+
+    def get_entry(self, key: str):
+        """
+        Read a cached entry without applying the TTL
+
+        Returns:
+            Tuple of (value, stored_at, expires_at) or None if not cached
+        """
+        key_hash = _key_hash(key)
+        key_bytes = key.encode('utf-8')
+        for slot in self._bucket_slots(key_hash):
+            found = self._read_slot(slot, key_hash, key_bytes)
+            if found is not None:
+                value, stored_at, expires_at = found
+                return json.loads(value), stored_at, expires_at
+        return None
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float = None,
+            stored_at: float = None) -> bool:
+        """
+        Store a value for key
+
+        Args:
+            key: Cache key (BIN number)
+            value: JSON-serializable result
+            ttl: Seconds until expiry (default: the cache's ttl)
+            stored_at: Original fetch time when copying from another tier
+
+        Returns:
+            False if the key or encoded value does not fit in a slot
+        """
+        key_bytes = key.encode('utf-8')
+        value_bytes = json.dumps(value, separators=(',', ':')).encode('utf-8')
+        if len(key_bytes) > _KEY_BYTES:
+            if not self.oversize_keys:
+                logger.warning(f"Shared cache key longer than {_KEY_BYTES} bytes not stored: {key}")
+            self.oversize_keys += 1
+            return False
+        if len(value_bytes) > self.max_value_bytes:
+            self.oversize_values += 1
+            return False
+
+        key_hash = _key_hash(key)
+        stored_at, expires_at = self._expiry(ttl, stored_at)
+
+        with self._thread_lock:
+            self._lock_bucket(key_hash, fcntl.LOCK_EX)
+            try:
+                slot = self._choose_slot(key_hash, key_bytes, time.time())
+                offset = self._slot_offset(slot)
+                seq = struct.unpack_from('<I', self._map, offset)[0]
+                # Odd sequence marks the slot as being written
+                struct.pack_into('<I', self._map, offset, (seq + 1) & 0xFFFFFFFF | 1)
+                start = offset + _SLOT_HEADER.size
+                self._map[start:start + len(key_bytes)] = key_bytes
+                self._map[start + _KEY_BYTES:start + _KEY_BYTES + len(value_bytes)] = value_bytes
+                _SLOT_HEADER.pack_into(self._map, offset, (seq + 1) & 0xFFFFFFFF | 1, key_hash,
+                                       stored_at, expires_at, len(key_bytes), len(value_bytes))
+                struct.pack_into('<I', self._map, offset, (seq + 2) & 0xFFFFFFFE)
+            finally:
+                self._lock_bucket(key_hash, fcntl.LOCK_UN)
+        return True
+
+    def _choose_slot(self, key_hash: int, key_bytes: bytes, now: float) -> int:
+        """Pick the slot to write: same key, then empty/expired, then oldest"""
+        oldest_slot, oldest_time = None, None
+        for slot in self._bucket_slots(key_hash):
+            offset = self._slot_offset(slot)
+            _, slot_hash, stored_at, expires_at, key_len, _ = _SLOT_HEADER.unpack_from(self._map, offset)
+            if slot_hash == key_hash:
+                start = offset + _SLOT_HEADER.size
+                if self._map[start:start + key_len] == key_bytes:
+                    return slot
+            if slot_hash == 0 or expires_at <= now:
+                return slot
+            if oldest_time is None or stored_at < oldest_time:
+                oldest_slot, oldest_time = slot, stored_at
+        return oldest_slot
+
+    def delete(self, key: str) -> None:
+        """Remove key from the cache if present"""
+        key_hash = _key_hash(key)
+        key_bytes = key.encode('utf-8')
+        with self._thread_lock:
+            self._lock_bucket(key_hash, fcntl.LOCK_EX)
+            try:
+                for slot in self._bucket_slots(key_hash):
+                    if self._read_slot(slot, key_hash, key_bytes) is not None:
+                        offset = self._slot_offset(slot)
+                        seq = struct.unpack_from('<I', self._map, offset)[0]
+                        _SLOT_HEADER.pack_into(self._map, offset, (seq + 2) & 0xFFFFFFFE,
+                                               0, 0.0, 0.0, 0, 0)
+            finally:
+                self._lock_bucket(key_hash, fcntl.LOCK_UN)
+
+    def clear(self) -> None:
+        """Drop every entry for all processes sharing the file"""
+        with self._thread_lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 0, self._data_offset)
+            try:
+                self._map[self._data_offset:] = bytes(self._size - self._data_offset)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 0, self._data_offset)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-process hit/miss counters plus a scan of live entries"""
+        now = time.time()
+        live = 0
+        for slot in range(self.slots):
+            _, slot_hash, _, expires_at, _, _ = _SLOT_HEADER.unpack_from(self._map, self._slot_offset(slot))
+            if slot_hash and expires_at > now:
+                live += 1
+        return {
+            'type': 'shared_memory',
+            'path': self.path,
+            'slots': self.slots,
+            'entries': live,
+            'oversize_keys': self.oversize_keys,
+            'oversize_values': self.oversize_values,
+            **self._counters(),
+        }
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+
+class SQLiteCache(BaseCache):
+    """
+    Persistent cache tier in a SQLite database running in WAL mode
+
+    Survives restarts, so a freshly deployed worker can answer previously seen
+    BINs without going to the network. WAL lets every worker read while one
+    writes. Each process runs a background compactor that drops expired rows,
+    trims the table to `max_entries` (evicting the entries closest to expiry)
+    and checkpoints the WAL.
+    """
+
+    def __init__(self, path: str, ttl: float = 86400, max_entries: int = 1000000,
+                 compact_interval: float = 300):
+        super().__init__(ttl)
+        self.path = path
+        self.max_entries = max_entries
+        self.compact_interval = compact_interval
+        self._local = threading.local()
+        self._compactor = None
+        self._compactor_pid = None
+        self._stop = threading.Event()
+
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'stored_at REAL NOT NULL, expires_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at)')
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread connection, reopened in a forked child"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            self._ensure_compactor()
+        return conn
+
+    def _ensure_compactor(self) -> None:
+        if self.compact_interval <= 0:
+            return
+        if self._compactor is not None and self._compactor_pid == os.getpid():
+            return
+        self._compactor_pid = os.getpid()
+        self._compactor = threading.Thread(target=self._compact_loop, name='bin-cache-compactor',
+                                           daemon=True)
+        self._compactor.start()
+
+    def _compact_loop(self) -> None:
+        while not self._stop.wait(self.compact_interval):
+            try:
+                self.compact()
+            except sqlite3.Error:
+                # Another worker holds the write lock; try again next round
+                pass
+
+    def get_entry(self, key: str):
+        """
+        Read a cached entry without applying the TTL
+
+        Returns:
+            Tuple of (value, stored_at, expires_at) or None if not cached
+        """
+        row = self._connection().execute(
+            'SELECT value, stored_at, expires_at FROM entries WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], row[2]
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float = None,
+            stored_at: float = None) -> bool:
+        """Store a value for key (see SharedMemoryCache.set)"""
+        stored_at, expires_at = self._expiry(ttl, stored_at)
+        self._connection().execute(
+            'INSERT OR REPLACE INTO entries (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)',
+            (key, json.dumps(value, separators=(',', ':')), stored_at, expires_at)
+        )
+        return True
+
+    def delete(self, key: str) -> None:
+        self._connection().execute('DELETE FROM entries WHERE key = ?', (key,))
+
+    def clear(self) -> None:
+        self._connection().execute('DELETE FROM entries')
+
+    def compact(self) -> Dict[str, int]:
+        """
+        Drop expired rows, enforce max_entries and checkpoint the WAL
+
+        Returns:
+            Dict with the number of expired and evicted rows removed
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            expired = conn.execute('DELETE FROM entries WHERE expires_at <= ?', (time.time(),)).rowcount
+            count = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+            evicted = 0
+            if count > self.max_entries:
+                evicted = conn.execute(
+                    'DELETE FROM entries WHERE key IN '
+                    '(SELECT key FROM entries ORDER BY expires_at LIMIT ?)',
+                    (count - self.max_entries,)
+                ).rowcount
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        return {'expired': expired, 'evicted': evicted}
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._connection().execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        return {
+            'type': 'sqlite',
+            'path': self.path,
+            'entries': entries,
+            'max_entries': self.max_entries,
+            **self._counters(),
+        }
+
+    def close(self) -> None:
+        self._stop.set()
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class TieredCache(BaseCache):
+    """
+    Read-through stack of cache tiers, fastest first
+
+    A hit in a lower tier (e.g. SQLite) is copied into the tiers above it
+    with its original timestamps, and writes go to every tier.
+    """
+
+    def __init__(self, *tiers: BaseCache):
+        super().__init__(tiers[0].ttl)
+        self.tiers = tiers
+
+    def get_entry(self, key: str):
+        for depth, tier in enumerate(self.tiers):
+            entry = tier.get_entry(key)
+            if entry is None:
+                continue
+            value, stored_at, expires_at = entry
+            remaining = expires_at - time.time()
+            if remaining > 0:
+                for upper in self.tiers[:depth]:
+                    upper.set(key, value, ttl=remaining, stored_at=stored_at)
+                return entry
+        return None
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float = None,
+            stored_at: float = None) -> bool:
+        stored = False
+        for tier in self.tiers:
+            stored = tier.set(key, value, ttl=ttl, stored_at=stored_at) or stored
+        return stored
+
+    def delete(self, key: str) -> None:
+        for tier in self.tiers:
+            tier.delete(key)
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {'type': 'tiered', **self._counters(), 'tiers': [tier.stats() for tier in self.tiers]}
+
+    def close(self) -> None:
+        for tier in self.tiers:
+            tier.close()
+
+
+class RangeCache(BaseCache):
+    """
+    Stores lookup results per account range so neighbouring BINs share one entry
+
+    A result is stored once under its range, and BINs point at it through
+    small alias entries, all kept in the wrapped tier so workers share them.
+
+    An upstream answer R for BIN p says R is the most specific range covering
+    p's block, so it also answers every shorter prefix of p whose whole block
+    lies inside R: 5454541 and 545454 after 54545412 matched the 6-digit range
+    545454, but neither after it matched a nested 54545400-54545499, since
+    they span other sub-ranges or the parent. A range no wider than an
+    8-digit block cannot have finer sub-ranges, so each of its 8-digit blocks
+    is answered too. Other BINs inside a wide range may belong to an 8-digit
+    sub-range that has not been seen yet, so they are misses.
+
+    With an index of the full range table (a BulkRangeResolver, see
+    set_index), every BIN maps straight to its most specific range, and any
+    cached result for that range is served.
+
+    When a refresh returns different bounds for a BIN, the old range entry
+    is deleted so that every alias pointing at it misses and refetches.
+    """
+
+    ALIAS_KEY = '$range'
+    MIN_BIN_LENGTH = 6
+    MAX_BIN_LENGTH = 8
+
+    def __init__(self, tier: BaseCache, index=None, generation: str = ''):
+        super().__init__(tier.ttl)
+        self.tier = tier
+        self.index = index
+        self.generation = generation
+
+    def set_index(self, index, generation: str = None) -> None:
+        """Attach a range index; a new generation orphans entries cached under the old one"""
+        self.index = index
+        if generation is not None:
+            self.generation = generation
+
+    def _range_key(self, low: int, high: int, length: int) -> str:
+        return f"r{self.generation}:{str(low).zfill(length)}+{high - low}"
+
+    def _bin_key(self, bin_number: str) -> str:
+        return f"b{self.generation}:{bin_number}"
+
+    def _index_key(self, bin_number: str) -> Optional[str]:
+        range_data = self.index.resolve_one(bin_number)
+        if range_data is None:
+            return None
+        return self._range_key(*range_bounds(range_data))
+
+    def get_entry(self, key: str):
+        if self.index is not None:
+            range_key = self._index_key(key)
+            return self.tier.get_entry(range_key) if range_key else None
+
+        alias = self.tier.get_entry(self._bin_key(key))
+        if alias is None:
+            return None
+        target = alias[0].get(self.ALIAS_KEY) if isinstance(alias[0], dict) else None
+        if target is None:
+            # Result without range bounds, cached per BIN
+            return alias
+        return self.tier.get_entry(target)
+
+    def _authoritative_prefixes(self, bin_number: str, low: int, high: int, length: int):
+        """BINs the range answers without risk of a more specific sub-range"""
+        record = BINRange(low, high, length)
+        prefixes = [bin_number[:size] for size in range(self.MIN_BIN_LENGTH, len(bin_number) + 1)
+                    if record.contains(bin_number[:size])]
+
+        if high - low < 10 ** (length - self.MAX_BIN_LENGTH):
+            for prefix in prefix_blocks(low, high, length):
+                if len(prefix) == self.MAX_BIN_LENGTH:
+                    prefixes.append(prefix)
+        return prefixes
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float = None,
+            stored_at: float = None) -> bool:
+        try:
+            low, high, length = range_bounds(value)
+        except (KeyError, TypeError, ValueError):
+            return self.tier.set(self._bin_key(key), value, ttl=ttl, stored_at=stored_at)
+
+        range_key = self._range_key(low, high, length)
+
+        # Range data changed for this BIN: drop the old range so its aliases miss
+        previous = self.tier.get_entry(self._bin_key(key))
+        if previous is not None and isinstance(previous[0], dict):
+            old_key = previous[0].get(self.ALIAS_KEY)
+            if old_key and old_key != range_key:
+                self.tier.delete(old_key)
+
+        stored = self.tier.set(range_key, value, ttl=ttl, stored_at=stored_at)
+        if stored and self.index is None:
+            alias = {self.ALIAS_KEY: range_key}
+            for prefix in self._authoritative_prefixes(key, low, high, length):
+                self.tier.set(self._bin_key(prefix), alias, ttl=ttl, stored_at=stored_at)
+        return stored
+
+    def delete(self, key: str) -> None:
+        entry = self.tier.get_entry(self._bin_key(key))
+        if entry is not None and isinstance(entry[0], dict) and self.ALIAS_KEY in entry[0]:
+            self.tier.delete(entry[0][self.ALIAS_KEY])
+        self.tier.delete(self._bin_key(key))
+
+    def invalidate_range(self, low_account_range: str, high_account_range: str) -> None:
+        """Drop the cached result for a range, e.g. after a range-data update"""
+        low, length = parse_account_range(low_account_range)
+        high, _ = parse_account_range(high_account_range)
+        self.tier.delete(self._range_key(low, high, length))
+
+    def clear(self) -> None:
+        self.tier.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {'type': 'range', 'indexed': self.index is not None, **self._counters(),
+                'tier': self.tier.stats()}
+
+    def close(self) -> None:
+        self.tier.close()
+
+
+class StaleWhileRevalidate:
+    """
+    Freshness policy with a soft TTL, a hard TTL and a serve-stale-on-error window
+
+    age < soft_ttl:                  serve from cache
+    soft_ttl <= age < hard_ttl:      serve from cache at once and refresh in the background
+    age >= hard_ttl:                 fetch; if the API is down or rate-limiting,
+                                     keep serving the old entry for stale_if_error seconds
+
+    Background refreshes run on a small thread pool, at most one per key and
+    at most `max_pending` at a time; beyond that the stale entry is simply
+    served until a later request schedules the refresh.
+    """
+
+    def __init__(self, soft_ttl: float, hard_ttl: float, stale_if_error: float = 0,
+                 workers: int = 2, max_pending: int = 256):
+        if soft_ttl > hard_ttl:
+            raise ValueError("soft_ttl must not exceed hard_ttl")
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.stale_if_error = stale_if_error
+        self.workers = workers
+        self.max_pending = max_pending
+
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.stale_on_error = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.refreshes_skipped = 0
+
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._executor = None
+        self._executor_pid = None
+
+    def store(self, cache: BaseCache, key: str, value: Dict[str, Any]) -> None:
+        """Write a freshly fetched value with the policy's retention"""
+        # Entries outlive the hard TTL by the stale-on-error window
+        cache.set(key, value, ttl=self.hard_ttl + self.stale_if_error)
+
+    def fetch(self, cache: BaseCache, key: str, loader: Callable[[], Dict[str, Any]],
+              stale_on: Tuple[type, ...] = (Exception,)) -> Dict[str, Any]:
+        """
+        Return the value for key according to the policy
+
+        Args:
+            cache: Cache tier holding the entries
+            key: Cache key (BIN number)
+            loader: Callable that fetches a fresh value from the API
+            stale_on: Exception types for which an expired entry may still be served
+
+        Returns:
+            Cached or freshly loaded value
+        """
+        entry = cache.get_entry(key)
+        now = time.time()
+
+        if entry is not None:
+            value, stored_at, expires_at = entry
+            age = now - stored_at
+            if age < self.soft_ttl:
+                self.fresh_hits += 1
+                return value
+            if age < self.hard_ttl:
+                self.stale_hits += 1
+                self._schedule_refresh(cache, key, loader)
+                return value
+
+        self.misses += 1
+        try:
+            result = loader()
+        except stale_on:
+            if entry is not None and now < entry[2]:
+                self.stale_on_error += 1
+                return entry[0]
+            raise
+
+        if result is not None:
+            self.store(cache, key, result)
+        return result
+
+    def _schedule_refresh(self, cache: BaseCache, key: str, loader: Callable) -> None:
+        with self._lock:
+            if key in self._pending:
+                return
+            if len(self._pending) >= self.max_pending:
+                self.refreshes_skipped += 1
+                return
+            # Threads do not survive fork, so each worker process gets its own pool
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='bin-refresh')
+                self._executor_pid = os.getpid()
+                self._pending = set()
+            self._pending.add(key)
+        self._executor.submit(self._refresh, cache, key, loader)
+
+    def _refresh(self, cache: BaseCache, key: str, loader: Callable) -> None:
+        try:
+            result = loader()
+            if result is not None:
+                self.store(cache, key, result)
+            self.refreshes += 1
+        except Exception as e:
+            self.refresh_failures += 1
+            logger.warning(f"Background refresh of {key} failed: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'soft_ttl': self.soft_ttl,
+            'hard_ttl': self.hard_ttl,
+            'stale_if_error': self.stale_if_error,
+            'fresh_hits': self.fresh_hits,
+            'stale_hits': self.stale_hits,
+            'stale_on_error': self.stale_on_error,
+            'misses': self.misses,
+            'refreshes': self.refreshes,
+            'refresh_failures': self.refresh_failures,
+            'refreshes_skipped': self.refreshes_skipped,
+            'refreshes_pending': len(self._pending),
+        }
+
+
+def default_shared_cache_path() -> str:
+    """Prefer tmpfs so the table never touches disk"""
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(directory, 'bin-lookup-cache')
+
+
+def create_bin_cache() -> Optional[BaseCache]:
+    """
+    Factory function to create the lookup cache from environment configuration
+
+    BIN_CACHE_SHARED=True enables the per-host shared-memory tier and
+    BIN_CACHE_DB=<path> the persistent SQLite tier; with both, they are
+    stacked with shared memory in front. BIN_CACHE_BY_RANGE=True stores
+    results per account range on top of whichever tiers are enabled.
+    """
+    ttl = float(os.getenv('BIN_CACHE_TTL', 86400))
+    tiers = []
+
+    if os.getenv('BIN_CACHE_SHARED', 'False').lower() == 'true':
+        tiers.append(SharedMemoryCache(
+            os.getenv('BIN_CACHE_PATH') or default_shared_cache_path(),
+            slots=int(os.getenv('BIN_CACHE_SLOTS', 16384)),
+            slot_size=int(os.getenv('BIN_CACHE_SLOT_SIZE', 1024)),
+            ttl=ttl
+        ))
+
+    if os.getenv('BIN_CACHE_DB'):
+        tiers.append(SQLiteCache(
+            os.getenv('BIN_CACHE_DB'),
+            ttl=ttl,
+            max_entries=int(os.getenv('BIN_CACHE_DB_MAX_ENTRIES', 1000000)),
+            compact_interval=float(os.getenv('BIN_CACHE_COMPACT_INTERVAL', 300))
+        ))
+
+    if not tiers:
+        return None
+    cache = tiers[0] if len(tiers) == 1 else TieredCache(*tiers)
+
+    if os.getenv('BIN_CACHE_BY_RANGE', 'False').lower() == 'true':
+        cache = RangeCache(cache)
+    return cache
+
+
+def create_freshness_policy() -> Optional[StaleWhileRevalidate]:
+    """
+    Factory function for the stale-while-revalidate policy
+
+    Enabled by BIN_CACHE_SOFT_TTL; BIN_CACHE_TTL becomes the hard TTL.
+    """
+    soft_ttl = os.getenv('BIN_CACHE_SOFT_TTL')
+    if not soft_ttl:
+        return None
+
+    return StaleWhileRevalidate(
+        soft_ttl=float(soft_ttl),
+        hard_ttl=float(os.getenv('BIN_CACHE_TTL', 86400)),
+        stale_if_error=float(os.getenv('BIN_CACHE_STALE_IF_ERROR', 0)),
+        workers=int(os.getenv('BIN_CACHE_REFRESH_WORKERS', 2)),
+        max_pending=int(os.getenv('BIN_CACHE_REFRESH_MAX_PENDING', 256))
+    )
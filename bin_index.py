@@ -0,0 +1,648 @@
+"""
+BIN Range Index Structures
+Local indexes over account range data for resolving BINs without an API call
+"""
+
+import os
+import struct
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from bin_ranges import BINRange, BINRangeTable, parse_account_range
+
+
+def range_bounds(range_data) -> Tuple[int, int, int]:
+    """Return (low, high, digit length) for an account range dict or BINRange"""
+    if isinstance(range_data, BINRange):
+        return range_data.low, range_data.high, range_data.length
+
+    low, length = parse_account_range(range_data['lowAccountRange'])
+    high, high_length = parse_account_range(range_data['highAccountRange'])
+    if high_length != length:
+        raise ValueError(f"Account range bounds differ in length: {low}-{high}")
+    if low > high:
+        raise ValueError(f"Account range low bound exceeds high bound: {low}-{high}")
+    return low, high, length
+
+
+def prefix_blocks(low: int, high: int, length: int) -> Iterator[str]:
+    """
+    Split an inclusive account range into the minimal set of aligned digit prefixes
+
+    e.g. 5454540000000000-5454549999999999 -> "545454", while a range that
+    ends mid-block yields several longer prefixes.
+
+    Args:
+        low: Lower bound of the range
+        high: Upper bound of the range
+        length: Number of digits in the account numbers
+
+    Returns:
+        Iterator of prefix strings that exactly cover the range
+    """
+    while low <= high:
+        # Grow the block while it stays aligned and inside the range
+        size = 1
+        suffix = 0
+        while (suffix < length and low % (size * 10) == 0
+               and low + size * 10 - 1 <= high):
+            size *= 10
+            suffix += 1
+        yield str(low).zfill(length)[:length - suffix]
+        low += size
+
+
+# 10**k for k = 0..19 as uint64; every bound is scaled to 19 digits
+_POW10 = np.array([10 ** k for k in range(20)], dtype=np.uint64)
+KEY_DIGITS = 19
+
+
+def _block_arrays(low: np.ndarray, high: np.ndarray, length: np.ndarray
+                  ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    prefix_blocks for many ranges at once
+
+    Each pass emits the next aligned block of every range not yet covered,
+    so the number of passes is the most blocks any one range needs (1 for
+    ranges that are whole 6- or 8-digit blocks).
+
+    Returns:
+        Tuple of (block prefix values, prefix digit counts, range positions)
+    """
+    prefixes, digits, owners = [], [], []
+    cursor = low.copy()
+    active = np.arange(len(low))
+    while active.size:
+        start, end, size = cursor[active], high[active], length[active]
+        # Largest aligned block starting at `start` that stays inside the range;
+        # alignment and fit both hold for every smaller power of ten too
+        suffix = np.zeros(len(active), dtype=np.int64)
+        for power in range(1, KEY_DIGITS + 1):
+            fits = ((suffix == power - 1) & (power <= size) & (start % _POW10[power] == 0)
+                    & (end - start >= _POW10[power] - np.uint64(1)))
+            if not fits.any():
+                break
+            suffix[fits] = power
+        prefixes.append(start // _POW10[suffix])
+        digits.append(size - suffix)
+        owners.append(active)
+        cursor[active] = start + _POW10[suffix]
+        active = active[cursor[active] <= end]
+    if not prefixes:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(prefixes), np.concatenate(digits), np.concatenate(owners)
+
+
+class BINRangeResolver:
+    """
+    Digit trie returning the most specific account range covering a BIN
+
+    Ranges are kept in a BINRangeTable and trie nodes refer to table rows,
+    so the index is a handful of flat int arrays with no per-range Python
+    objects; forked workers share its pages copy-on-write. The trie is built
+    level by level with NumPy; add_range() inserts single ranges afterwards.
+    """
+
+    NO_NODE = 0
+    NO_RANGE = -1
+
+    def __init__(self, ranges: Iterable = ()):
+        """
+        Args:
+            ranges: A BINRangeTable (indexed in place, not copied), or any
+                    iterable of range dicts / BINRange records
+        """
+        self.table = ranges if isinstance(ranges, BINRangeTable) else BINRangeTable(ranges)
+        # Flat array-backed trie: node i owns children[i*10:(i+1)*10]. Node 0
+        # is the root, so 0 doubles as the "no child" marker. node_range holds
+        # the table row of the narrowest range ending at each node.
+        self._children = array('i', [self.NO_NODE] * 10)
+        self._node_range = array('i', [self.NO_RANGE])
+        # Width of each indexed row scaled to 19 digits, so ranges of different
+        # account-number lengths compare on the same footing
+        self._widths = array('Q')
+        self._build()
+
+    def _build(self) -> None:
+        """Index every table row in one vectorized pass"""
+        count = len(self.table)
+        if not count:
+            return
+        length = np.frombuffer(self.table.length, dtype=np.uint8).astype(np.int64)
+        low = np.frombuffer(self.table.low, dtype=np.uint64)
+        high = np.frombuffer(self.table.high, dtype=np.uint64)
+        if np.any(low > high):
+            raise ValueError("Account range low bound exceeds high bound")
+        widths = (high - low + np.uint64(1)) * _POW10[KEY_DIGITS - length]
+        prefixes, digits, rows = _block_arrays(low, high, length)
+
+        # Trie nodes are the distinct digit strings that prefix some block,
+        # numbered depth by depth after the root. Built from the deepest level
+        # up: each level is its own blocks plus the parents of the level below
+        max_depth = int(digits.max())
+        # Blocks grouped by depth: by_depth[split[d]:split[d + 1]] end at depth d
+        by_depth = np.argsort(digits, kind='stable')
+        split = np.searchsorted(digits[by_depth], np.arange(max_depth + 2))
+        level_values = [np.zeros(0, dtype=np.uint64)] * (max_depth + 1)
+        below = np.zeros(0, dtype=np.uint64)
+        for depth in range(max_depth, 0, -1):
+            blocks = prefixes[by_depth[split[depth]:split[depth + 1]]]
+            values = np.sort(np.concatenate((below // np.uint64(10), blocks)))
+            keep = np.ones(len(values), dtype=bool)
+            keep[1:] = values[1:] != values[:-1]
+            level_values[depth] = below = values[keep]
+        level_values[0] = np.zeros(1, dtype=np.uint64)
+        level_base = np.concatenate(([0], np.cumsum([len(values) for values in level_values]))).tolist()
+        node_total = level_base[-1]
+
+        # Link each node into its parent's child slot for its last digit
+        children = np.zeros(node_total * 10, dtype=np.int32)
+        for depth in range(1, len(level_values)):
+            values = level_values[depth]
+            parents = level_base[depth - 1] + np.searchsorted(level_values[depth - 1], values // np.uint64(10))
+            children[parents * 10 + (values % np.uint64(10)).astype(np.int64)] = (
+                level_base[depth] + np.arange(len(values)))
+
+        # Each block ends at the node for its full prefix; the narrowest range
+        # wins a node, and among equal widths the one added last (as add_range does)
+        ends = np.empty(len(prefixes), dtype=np.int64)
+        for depth in range(max_depth + 1):
+            at = by_depth[split[depth]:split[depth + 1]]
+            ends[at] = level_base[depth] + np.searchsorted(level_values[depth], prefixes[at])
+        order = np.lexsort((-rows, widths[rows], ends))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = ends[order][1:] != ends[order][:-1]
+        node_range = np.full(node_total, self.NO_RANGE, dtype=np.int32)
+        node_range[ends[order][first]] = rows[order][first]
+
+        self._children = array('i', children.tobytes())
+        self._node_range = array('i', node_range.tobytes())
+        self._widths = array('Q', widths.tobytes())
+
+    def __len__(self) -> int:
+        return len(self._widths)
+
+    @property
+    def node_count(self) -> int:
+        """Number of trie nodes including the root"""
+        return len(self._node_range)
+
+    def _new_node(self) -> int:
+        self._children.extend([self.NO_NODE] * 10)
+        self._node_range.append(self.NO_RANGE)
+        return len(self._node_range) - 1
+
+    def add_range(self, range_data) -> None:
+        """
+        Append an account range to the table and index it
+
+        Nested ranges (e.g. an 8-digit sub-range inside its 6-digit parent)
+        are kept side by side; resolve() picks the narrowest that covers the
+        query. Adjacent ranges map to disjoint prefixes.
+
+        Args:
+            range_data: Dict with lowAccountRange and highAccountRange, or a BINRange
+        """
+        low, high, length = range_bounds(range_data)
+        if len(self.table) != len(self._widths):
+            raise ValueError("Range table changed outside the resolver")
+        self.table.append(range_data)
+        row = len(self._widths)
+        width = (high - low + 1) * 10 ** (19 - length)
+        self._widths.append(width)
+
+        for prefix in prefix_blocks(low, high, length):
+            node = 0
+            for digit in prefix:
+                slot = node * 10 + int(digit)
+                child = self._children[slot]
+                if child == self.NO_NODE:
+                    child = self._new_node()
+                    self._children[slot] = child
+                node = child
+
+            current = self._node_range[node]
+            if current == self.NO_RANGE or width <= self._widths[current]:
+                self._node_range[node] = row
+
+    def resolve(self, bin_number: str):
+        """
+        Find the most specific range covering every account number with this prefix
+
+        Walks at most len(bin_number) trie nodes. A 6-digit BIN resolves to its
+        6-digit parent range even when 8-digit sub-ranges exist beneath it; the
+        8-digit BIN resolves to the sub-range.
+
+        Args:
+            bin_number: BIN or PAN prefix (digits only)
+
+        Returns:
+            The matching BINRange, or None if no range covers the prefix
+        """
+        if not bin_number or not (bin_number.isascii() and bin_number.isdigit()):
+            raise ValueError("BIN number must be numeric")
+
+        best = self.NO_RANGE
+        node = 0
+        # isdigit() alone admits non-ASCII digits such as '²', which ord() would map off the trie
+        for digit in bin_number:
+            node = self._children[node * 10 + ord(digit) - 48]
+            if node == self.NO_NODE:
+                break
+            candidate = self._node_range[node]
+            if candidate != self.NO_RANGE and (
+                    best == self.NO_RANGE or self._widths[candidate] <= self._widths[best]):
+                best = candidate
+
+        return self.table[best] if best != self.NO_RANGE else None
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Report the memory held by the index, including the range table it resolves into
+
+        Returns:
+            Dict with node/range counts and byte sizes of the trie, widths and table
+        """
+        trie_bytes = (self._children.itemsize * len(self._children)
+                      + self._node_range.itemsize * len(self._node_range))
+        width_bytes = self._widths.itemsize * len(self._widths)
+        table_bytes = self.table.memory_usage()['total_bytes']
+        total = trie_bytes + width_bytes + table_bytes
+        return {
+            'ranges': len(self),
+            'nodes': self.node_count,
+            'trie_bytes': trie_bytes,
+            'width_bytes': width_bytes,
+            'table_bytes': table_bytes,
+            'total_bytes': total,
+            'bytes_per_range': total // len(self) if len(self) else 0,
+        }
+
+    @classmethod
+    def from_client(cls, client, size: int = 100) -> 'BINRangeResolver':
+        """Build a resolver from every range returned by the client's /bin-ranges pages"""
+        return cls(BINRangeTable.from_client(client, size=size))
+
+
+class BulkRangeResolver:
+    """
+    Vectorized resolver for large arrays of BINs or PAN prefixes
+
+    Every range is scaled to a 19-digit key interval and the intervals are
+    sorted by (low ascending, high descending), so each range follows the
+    range that contains it. A query prefix is also an interval; one
+    np.searchsorted finds the last range starting at or before it, and a few
+    vectorized steps up the parent links reach the narrowest range that
+    covers the whole interval - the same answer BINRangeResolver.resolve
+    gives. Ranges must be disjoint or nested, as /bin-ranges data is.
+    """
+
+    CHUNK_SIZE = 1 << 22
+
+    def __init__(self, table: BINRangeTable):
+        self.table = table
+        count = len(table)
+        length = np.frombuffer(table.length, dtype=np.uint8).astype(np.intp)
+        scale = _POW10[KEY_DIGITS - length]
+        low = np.frombuffer(table.low, dtype=np.uint64) * scale
+        high = (np.frombuffer(table.high, dtype=np.uint64) + np.uint64(1)) * scale - np.uint64(1)
+
+        # ~high sorts descending, so a parent precedes ranges sharing its low bound
+        order = np.lexsort((~high, low)) if count else np.zeros(0, dtype=np.intp)
+        self._low = low[order]
+        self._high = high[order]
+        self._rows = order.astype(np.int64)
+        self._parent, self.max_depth = self._link_parents(self._low, self._high)
+
+    @staticmethod
+    def _link_parents(low: np.ndarray, high: np.ndarray) -> Tuple[np.ndarray, int]:
+        """Parent position of every sorted range (-1 at top level) and the deepest nesting"""
+        parent = np.full(len(low), -1, dtype=np.int64)
+        stack: List[int] = []
+        max_depth = 0
+        highs = high.tolist()
+        for position, (start, end) in enumerate(zip(low.tolist(), highs)):
+            while stack and highs[stack[-1]] < start:
+                stack.pop()
+            if stack:
+                if highs[stack[-1]] < end:
+                    raise ValueError(f"Account ranges overlap without nesting at key {start}")
+                parent[position] = stack[-1]
+            stack.append(position)
+            max_depth = max(max_depth, len(stack) - 1)
+        return parent, max_depth
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def resolve(self, bins, digits=8) -> np.ndarray:
+        """
+        Resolve many BINs or PAN prefixes at once
+
+        Args:
+            bins: Integer array-like of prefixes (e.g. from BINValidator.clean_bins)
+            digits: Digit count of each prefix - a scalar, or an array matching bins
+                    when lengths differ (leading zeros are not visible in integers)
+
+        Returns:
+            int64 array of table row indexes, -1 where no range covers the prefix
+        """
+        bins = np.asarray(bins)
+        digits = np.broadcast_to(np.asarray(digits, dtype=np.intp), bins.shape)
+        if bins.size and (digits.min() < 1 or digits.max() > KEY_DIGITS):
+            raise ValueError(f"Prefix digits must be between 1 and {KEY_DIGITS}")
+        if bins.size and bins.min() < 0:
+            raise ValueError("BIN numbers must be non-negative")
+
+        flat_bins = bins.reshape(-1)
+        flat_digits = digits.reshape(-1)
+        rows = np.empty(flat_bins.size, dtype=np.int64)
+        # Chunked so temporaries stay bounded for arrays of tens of millions
+        for start in range(0, flat_bins.size, self.CHUNK_SIZE):
+            stop = start + self.CHUNK_SIZE
+            rows[start:stop] = self._resolve_chunk(flat_bins[start:stop].astype(np.uint64),
+                                                   flat_digits[start:stop])
+        return rows.reshape(bins.shape)
+
+    def _resolve_chunk(self, prefixes: np.ndarray, digits: np.ndarray) -> np.ndarray:
+        if np.any(prefixes >= _POW10[digits]):
+            raise ValueError("BIN number has more digits than specified")
+        step = _POW10[KEY_DIGITS - digits]
+        first = prefixes * step
+        last = first + (step - np.uint64(1))
+
+        position = np.searchsorted(self._low, first, side='right') - 1
+        for _ in range(self.max_depth + 1):
+            found = position >= 0
+            # Every ancestor starts at or before `first`; it matches once it also reaches `last`
+            short = found & (self._high[np.where(found, position, 0)] < last)
+            if not short.any():
+                break
+            position = np.where(short, self._parent[np.where(short, position, 0)], position)
+
+        return np.where(position >= 0, self._rows[np.maximum(position, 0)], -1)
+
+    def resolve_one(self, bin_number: str) -> Optional[BINRange]:
+        """
+        Resolve a single BIN or PAN prefix, as BINRangeResolver.resolve does
+
+        Args:
+            bin_number: BIN or PAN prefix (digits only)
+
+        Returns:
+            The matching BINRange, or None if no range covers the prefix
+        """
+        if not bin_number or not (bin_number.isascii() and bin_number.isdigit()) or len(bin_number) > KEY_DIGITS:
+            raise ValueError(f"BIN number must be 1-{KEY_DIGITS} digits")
+        step = 10 ** (KEY_DIGITS - len(bin_number))
+        first = int(bin_number) * step
+        last = first + step - 1
+
+        position = int(np.searchsorted(self._low, np.uint64(first), side='right')) - 1
+        # Ancestors all start at or before `first`; the first one reaching `last` covers it
+        while position >= 0 and int(self._high[position]) < last:
+            position = int(self._parent[position])
+        return self.table[int(self._rows[position])] if position >= 0 else None
+
+    def overlapping(self, prefix: str) -> Tuple[List[int], slice]:
+        """
+        Find every range that overlaps the accounts starting with `prefix`
+
+        Args:
+            prefix: BIN or PAN prefix (digits only)
+
+        Returns:
+            Tuple of (table rows of ranges that start before the prefix and reach
+            into it, outermost first; slice of sorted positions - see rows_at -
+            of the ranges starting inside it, in ascending BIN order)
+        """
+        if not prefix or not (prefix.isascii() and prefix.isdigit()) or len(prefix) > KEY_DIGITS:
+            raise ValueError(f"Prefix must be 1-{KEY_DIGITS} digits")
+        step = 10 ** (KEY_DIGITS - len(prefix))
+        first = np.uint64(int(prefix) * step)
+        last = np.uint64(int(prefix) * step + step - 1)
+
+        start = int(np.searchsorted(self._low, first, side='left'))
+        stop = int(np.searchsorted(self._low, last, side='right'))
+
+        # Earlier ranges reaching `first` are all ancestors of the last one starting before it
+        covering = []
+        position = start - 1
+        while position >= 0 and self._high[position] < first:
+            position = self._parent[position]
+        while position >= 0:
+            covering.append(int(self._rows[position]))
+            position = self._parent[position]
+        return covering[::-1], slice(start, stop)
+
+    def rows_at(self, positions) -> np.ndarray:
+        """Table rows for sorted positions (an index array or a slice from overlapping)"""
+        return self._rows[positions]
+
+    def codes(self, key: str, rows: np.ndarray) -> np.ndarray:
+        """Dictionary codes of `key` for each resolved row (0 where absent or unresolved)"""
+        column = self.table.columns.get(key)
+        if column is None:
+            return np.zeros(np.shape(rows), dtype=np.uint32)
+        codes = np.frombuffer(column, dtype=np.uint32)[np.maximum(rows, 0)]
+        return np.where(rows >= 0, codes, 0).astype(np.uint32)
+
+    def gather(self, key: str, rows: np.ndarray) -> np.ndarray:
+        """Values of `key` (issuerName, countryCode, ...) for each resolved row, None if unresolved"""
+        values = np.empty(len(self.table.dictionaries.get(key, [None])), dtype=object)
+        values[:] = self.table.dictionaries.get(key, [None])
+        return values[self.codes(key, rows)]
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Bytes held by the sorted bound, row and parent arrays (the table is shared)"""
+        index_bytes = sum(a.nbytes for a in (self._low, self._high, self._rows, self._parent))
+        return {
+            'ranges': len(self),
+            'max_depth': self.max_depth,
+            'index_bytes': index_bytes,
+            'bytes_per_range': index_bytes // len(self) if len(self) else 0,
+        }
+
+    @classmethod
+    def from_client(cls, client, size: int = 100) -> 'BulkRangeResolver':
+        """Build a resolver from every range returned by the client's /bin-ranges pages"""
+        return cls(BINRangeTable.from_client(client, size=size))
+
+
+COVERAGE_MAGIC = b'BINCOVR\x00'
+COVERAGE_VERSION = 1
+# magic, version, reserved, covered 6-digit prefixes, covered 8-digit prefixes
+_COVERAGE_HEADER = struct.Struct('<8sIIQQ')
+
+
+def _prefix_intervals(table: BINRangeTable, digits: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Sorted, disjoint [first, last] intervals of `digits`-digit prefixes touched by any range"""
+    if not len(table):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    length = np.frombuffer(table.length, dtype=np.uint8).astype(np.intp)
+    low = np.frombuffer(table.low, dtype=np.uint64)
+    high = np.frombuffer(table.high, dtype=np.uint64)
+
+    # Ranges longer than `digits` are truncated, shorter ones widened
+    longer = length >= digits
+    down = _POW10[np.where(longer, length - digits, 0)]
+    up = _POW10[np.where(longer, 0, digits - length)]
+    first = np.where(longer, low // down, low * up)
+    last = np.where(longer, high // down, (high + np.uint64(1)) * up - np.uint64(1))
+
+    order = np.argsort(first, kind='stable')
+    first, last = first[order], np.maximum.accumulate(last[order])
+    # A new interval starts wherever a range begins past everything before it (adjacent ones merge)
+    starts = np.ones(len(first), dtype=bool)
+    starts[1:] = first[1:] > last[:-1] + np.uint64(1)
+    ends = np.append(starts[1:], True)
+    return first[starts].astype(np.int64), last[ends].astype(np.int64)
+
+
+def _interval_bits(first: np.ndarray, last: np.ndarray, size: int, chunk: int = 1 << 23) -> np.ndarray:
+    """Pack disjoint inclusive intervals into a little-endian bitmap of `size` bits"""
+    bits = np.zeros((size + 7) // 8, dtype=np.uint8)
+    for start in range(0, size, chunk):
+        stop = min(start + chunk, size)
+        lo = np.searchsorted(last, start, side='left')
+        hi = np.searchsorted(first, stop, side='left')
+        # Disjoint, non-adjacent intervals never share a boundary, so plain stores suffice
+        edges = np.zeros(stop - start + 1, dtype=np.int8)
+        edges[np.maximum(first[lo:hi], start) - start] = 1
+        edges[np.minimum(last[lo:hi], stop - 1) + 1 - start] = -1
+        covered = np.cumsum(edges[:-1], dtype=np.int8).astype(bool)
+        bits[start // 8:(stop + 7) // 8] = np.packbits(covered, bitorder='little')
+    return bits
+
+
+class CoverageBitmap:
+    """
+    Dense bitmaps of the 6-digit (125 KB) and 8-digit (12.5 MB) BIN spaces
+
+    A bit is set when at least one account range overlaps that prefix, so a
+    clear bit proves no range can match and the BIN can be rejected without
+    an upstream call. Saved files are loaded with np.memmap: the pages are
+    shared by every process that maps them and only touched bits are read.
+    """
+
+    SIZES = {6: 10 ** 6, 8: 10 ** 8}
+
+    def __init__(self, bits6: np.ndarray, bits8: np.ndarray, covered6: int = None, covered8: int = None):
+        if len(bits6) != self.SIZES[6] // 8 or len(bits8) != self.SIZES[8] // 8:
+            raise ValueError("Coverage bitmaps must span the whole 6 and 8 digit spaces")
+        self.bits = {6: bits6, 8: bits8}
+        self.covered = {
+            6: covered6 if covered6 is not None else self._count(bits6),
+            8: covered8 if covered8 is not None else self._count(bits8),
+        }
+
+    @staticmethod
+    def _count(bits: np.ndarray, chunk: int = 1 << 20) -> int:
+        return int(sum(np.unpackbits(bits[start:start + chunk]).sum(dtype=np.int64)
+                       for start in range(0, len(bits), chunk)))
+
+    @classmethod
+    def from_table(cls, table: BINRangeTable) -> 'CoverageBitmap':
+        """Build both bitmaps from a range table with vectorized interval marking"""
+        bits = {}
+        covered = {}
+        for digits, size in cls.SIZES.items():
+            first, last = _prefix_intervals(table, digits)
+            bits[digits] = _interval_bits(first, last, size)
+            covered[digits] = int((last - first + 1).sum())
+        return cls(bits[6], bits[8], covered[6], covered[8])
+
+    @classmethod
+    def from_client(cls, client, size: int = 100) -> 'CoverageBitmap':
+        """Build the bitmaps from every range returned by the client's /bin-ranges pages"""
+        return cls.from_table(BINRangeTable.from_client(client, size=size))
+
+    def covers(self, bin_number: str) -> bool:
+        """
+        Whether any account range could match this BIN or PAN prefix
+
+        6 and 8 digit BINs test a single bit; other lengths test the block of
+        bits beneath them (longer prefixes are checked on their first 8 digits).
+
+        Args:
+            bin_number: BIN or PAN prefix (digits only)
+
+        Returns:
+            False only when no range overlaps the prefix
+        """
+        if not bin_number or not (bin_number.isascii() and bin_number.isdigit()):
+            raise ValueError("BIN number must be numeric")
+
+        digits = 6 if len(bin_number) <= 6 else 8
+        prefix = int(bin_number[:digits])
+        count = 10 ** (digits - len(bin_number)) if len(bin_number) < digits else 1
+        start = prefix * count
+        bits = self.bits[digits]
+        if count == 1:
+            return bool(bits[start >> 3] >> (start & 7) & 1)
+
+        block = np.unpackbits(bits[start >> 3:((start + count - 1) >> 3) + 1], bitorder='little')
+        return bool(block[start & 7:(start & 7) + count].any())
+
+    def covers_many(self, bins, digits: int = 8) -> np.ndarray:
+        """
+        Vectorized covers() for an integer array of same-length BINs
+
+        Args:
+            bins: Integer array-like of BINs (e.g. from BINValidator.clean_bins)
+            digits: 6 or 8
+
+        Returns:
+            bool array, False where no range overlaps the BIN
+        """
+        if digits not in self.SIZES:
+            raise ValueError("digits must be 6 or 8")
+        bins = np.asarray(bins, dtype=np.int64)
+        if bins.size and (bins.min() < 0 or bins.max() >= self.SIZES[digits]):
+            raise ValueError("BIN number has more digits than specified")
+        return (self.bits[digits][bins >> 3] >> (bins & 7) & 1).astype(bool)
+
+    def save(self, path: str) -> int:
+        """
+        Write both bitmaps after a fixed 32-byte header, via a temporary file and rename
+
+        Returns:
+            Size of the file in bytes
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_COVERAGE_HEADER.pack(COVERAGE_MAGIC, COVERAGE_VERSION, 0, self.covered[6], self.covered[8]))
+            f.write(np.ascontiguousarray(self.bits[6]).tobytes())
+            f.write(np.ascontiguousarray(self.bits[8]).tobytes())
+            size = f.tell()
+        os.replace(tmp_path, path)
+        return size
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'CoverageBitmap':
+        """Open a file written by save(); with mmap=True the bitmaps stay on the page cache"""
+        with open(path, 'rb') as f:
+            magic, version, _, covered6, covered8 = _COVERAGE_HEADER.unpack(f.read(_COVERAGE_HEADER.size))
+            if magic != COVERAGE_MAGIC:
+                raise ValueError(f"Not a coverage bitmap: {path}")
+            if version != COVERAGE_VERSION:
+                raise ValueError(f"Unsupported coverage bitmap version: {version}")
+            if not mmap:
+                bits6 = np.fromfile(f, dtype=np.uint8, count=cls.SIZES[6] // 8)
+                bits8 = np.fromfile(f, dtype=np.uint8, count=cls.SIZES[8] // 8)
+                return cls(bits6, bits8, covered6, covered8)
+
+        offset = _COVERAGE_HEADER.size
+        bits6 = np.memmap(path, dtype=np.uint8, mode='r', offset=offset, shape=(cls.SIZES[6] // 8,))
+        bits8 = np.memmap(path, dtype=np.uint8, mode='r', offset=offset + len(bits6), shape=(cls.SIZES[8] // 8,))
+        return cls(bits6, bits8, covered6, covered8)
+
+    def stats(self) -> Dict[str, int]:
+        """Covered prefix counts and bitmap sizes"""
+        return {
+            'covered_6_digit': self.covered[6],
+            'covered_8_digit': self.covered[8],
+            'bitmap_bytes': len(self.bits[6]) + len(self.bits[8]),
+        }
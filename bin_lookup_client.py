@@ -6,46 +6,144 @@ Provides methods to interact with Mastercard BIN Lookup APIs
 import requests
 import json
 import os
-from typing import Dict, List, Optional, Union
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from mastercard_auth import MastercardAuth, create_mastercard_auth
+from bin_ranges import iter_json_array
+from bin_cache import StaleWhileRevalidate, create_bin_cache, create_freshness_policy
+from upstreams import UpstreamPool, parse_upstreams
+
+
+class RateLimitError(ValueError):
+    """Raised when the Mastercard API responds with 429 Too Many Requests"""
+
+
+class UpstreamUnavailableError(Exception):
+    """Raised when the Mastercard API cannot be reached or fails with a server error"""
 
 
 class BINLookupClient:
     """Client for Mastercard BIN Lookup API"""
     
-    def __init__(self, auth: MastercardAuth, base_url: str = None):
+    def __init__(self, auth: MastercardAuth, base_url: Union[str, Sequence[str]] = None,
+                 pool_size: int = None, cache=None, freshness: StaleWhileRevalidate = None):
         self.auth = auth
-        self.base_url = base_url or os.getenv('MASTERCARD_BASE_URL', 'https://sandbox.api.mastercard.com')
+        self.cache = cache
+        self.freshness = freshness
+        self.batch_endpoint = os.getenv('MASTERCARD_BATCH_ENDPOINT')
+        # Optional bin_index.CoverageBitmap; BINs it rules out never reach the API
+        self.coverage = None
+        if isinstance(base_url, str):
+            base_url = [base_url]
+        urls = (base_url or parse_upstreams(os.getenv('MASTERCARD_BASE_URLS'))
+                or [os.getenv('MASTERCARD_BASE_URL', 'https://sandbox.api.mastercard.com')])
+        self.upstreams = UpstreamPool(
+            urls,
+            eject_after=int(os.getenv('UPSTREAM_EJECT_AFTER', 3)),
+            eject_seconds=float(os.getenv('UPSTREAM_EJECT_SECONDS', 5)),
+            max_eject_seconds=float(os.getenv('UPSTREAM_MAX_EJECT_SECONDS', 60))
+        )
+        self.base_url = self.upstreams.primary.url
+        self.pool_size = pool_size or int(os.getenv('MASTERCARD_POOL_SIZE', 10))
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.upstreams), pool_maxsize=self.pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def warm_connections(self, count: int, timeout: float = 5) -> int:
+        """
+        Pre-open pooled keep-alive connections to the API host
+
+        Issues concurrent unsigned HEAD requests so the TLS handshakes happen
+        now rather than on the first real lookups. Connections are spread
+        across the configured upstreams. Failures are tolerated.
+
+        Args:
+            count: Number of connections to open (capped at pool_size)
+            timeout: Per-connection timeout in seconds
+
+        Returns:
+            Number of connections that were opened successfully
+        """
+        count = min(count, self.pool_size)
+        if count < 1:
+            return 0
+
+        urls = [upstream.url for upstream in self.upstreams.upstreams]
+
+        def open_connection(i: int) -> bool:
+            try:
+                # Reading the (empty) body hands the connection back to the pool
+                self.session.head(urls[i % len(urls)], timeout=timeout).content
+                return True
+            except requests.exceptions.RequestException:
+                return False
+
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            return sum(executor.map(open_connection, range(count)))
     
     def _make_request(self, method: str, endpoint: str, params: Dict = None, data: Dict = None) -> Dict:
         """Make authenticated request to Mastercard API"""
-        url = f"{self.base_url}{endpoint}"
-        
+        return self._handle_response(self._send(method, endpoint, params=params, data=data))
+
+    def _send(self, method: str, endpoint: str, params: Dict = None, data: Dict = None,
+              stream: bool = False) -> requests.Response:
+        """Sign and send a request to the best available upstream"""
         # Prepare request body
         body = json.dumps(data) if data else None
-        
-        # Get authorization header
-        auth_header = self.auth.get_authorization_header(method, url, body)
-        
-        # Set headers
-        headers = {
-            'Authorization': auth_header,
-            'Content-Type': 'application/json',
-            'Accept': 'application/json'
-        }
-        
+
+        # Connection errors and 5xx responses are retried once on another upstream
+        tried = []
+        last_error = None
+        for _ in range(min(len(self.upstreams), 2)):
+            upstream = self.upstreams.select(exclude=tried)
+            tried.append(upstream)
+            url = f"{upstream.url}{endpoint}"
+
+            started = time.monotonic()
+            try:
+                # Get authorization header (the signature covers the full URL)
+                auth_header = self.auth.get_authorization_header(method, url, body)
+
+                # Set headers
+                headers = {
+                    'Authorization': auth_header,
+                    'Content-Type': 'application/json',
+                    'Accept': 'application/json'
+                }
+
+                response = self.session.request(
+                    method=method,
+                    url=url,
+                    headers=headers,
+                    params=params,
+                    data=body,
+                    timeout=30,
+                    stream=stream
+                )
+                if response.status_code >= 500:
+                    response.close()
+                    response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                self.upstreams.record_failure(upstream, time.monotonic() - started)
+                last_error = e
+                continue
+            except BaseException:
+                # Signing or request setup failed: free the in-flight slot without scoring the upstream
+                self.upstreams.release(upstream)
+                raise
+
+            self.upstreams.record_success(upstream, time.monotonic() - started)
+            return response
+
+        raise UpstreamUnavailableError(f"API request failed: {str(last_error)}")
+
+    def _handle_response(self, response: requests.Response) -> Dict:
+        """Decode a response, mapping error statuses to exceptions"""
         try:
-            response = self.session.request(
-                method=method,
-                url=url,
-                headers=headers,
-                params=params,
-                data=body,
-                timeout=30
-            )
-            
-            # Handle response
             if response.status_code == 200:
                 return response.json()
             elif response.status_code == 400:
@@ -58,12 +156,12 @@ class BINLookupClient:
             elif response.status_code == 404:
                 raise ValueError("Not Found: Endpoint or resource not found")
             elif response.status_code == 429:
-                raise ValueError("Rate Limit Exceeded: Too many requests")
+                raise RateLimitError("Rate Limit Exceeded: Too many requests")
             else:
                 response.raise_for_status()
-                
+
         except requests.exceptions.RequestException as e:
-            raise Exception(f"API request failed: {str(e)}")
+            raise UpstreamUnavailableError(f"API request failed: {str(e)}")
     
     def get_account_ranges(self, page: int = 1, size: int = 25, sort: str = "-lowAccountRange") -> Dict:
         """
@@ -84,7 +182,73 @@ class BINLookupClient:
         }
         
         return self._make_request('GET', '/bin-ranges', params=params)
-    
+
+    def stream_account_ranges(self, page: int = 1, size: int = 25, sort: str = "-lowAccountRange",
+                              info: Dict = None, chunk_size: int = 65536):
+        """
+        Retrieve one page of account ranges, yielding records as they arrive
+
+        The `content` array is parsed incrementally from the response socket,
+        so large pages never sit in memory whole and the first record is
+        available before the body has finished downloading.
+
+        Args:
+            page: Page number (default: 1)
+            size: Number of results per page (default: 25)
+            sort: Sort order (default: "-lowAccountRange")
+            info: If given, receives the page's other fields (last, totalPages, ...)
+                  once every record has been yielded
+            chunk_size: Bytes read from the socket at a time
+
+        Yields:
+            Account range dicts from the page's content
+        """
+        params = {
+            'page': page,
+            'size': size,
+            'sort': sort
+        }
+
+        response = self._send('GET', '/bin-ranges', params=params, stream=True)
+        with response:
+            if response.status_code != 200:
+                self._handle_response(response)
+                return
+            try:
+                yield from iter_json_array(response.iter_content(chunk_size), info=info)
+            except requests.exceptions.RequestException as e:
+                raise UpstreamUnavailableError(f"API request failed: {str(e)}")
+
+    def iter_account_ranges(self, size: int = 100, sort: str = "lowAccountRange", stream: bool = True):
+        """
+        Iterate over every account range, fetching pages as needed
+
+        Args:
+            size: Number of results per page (default: 100)
+            sort: Sort order (default: "lowAccountRange")
+            stream: Parse each page incrementally (see stream_account_ranges)
+
+        Yields:
+            Account range dicts from each page's content
+        """
+        page = 1
+        while True:
+            if stream:
+                result = {}
+                count = 0
+                for record in self.stream_account_ranges(page=page, size=size, sort=sort, info=result):
+                    count += 1
+                    yield record
+            else:
+                result = self.get_account_ranges(page=page, size=size, sort=sort)
+                content = result.get('content') or []
+                count = len(content)
+                yield from content
+
+            if not count or result.get('last') or count < size:
+                break
+            page += 1
+
     def lookup_bin(self, bin_number: str) -> Dict:
         """
         Lookup BIN information for a given BIN number
@@ -102,8 +266,170 @@ class BINLookupClient:
         if len(bin_number) < 6 or len(bin_number) > 8:
             raise ValueError("BIN number must be 6-8 digits long")
         
+        if self._uncovered(bin_number):
+            raise ValueError("Not Found: No account range covers this BIN")
+
         endpoint = f"/bin-ranges/{bin_number}"
-        return self._make_request('GET', endpoint)
+        return self._cached(bin_number, lambda: self._make_request('GET', endpoint))
+
+    def _uncovered(self, bin_number: str) -> bool:
+        """Whether the coverage bitmap proves no account range matches this BIN"""
+        return (self.coverage is not None and bin_number.isdigit()
+                and not self.coverage.covers(bin_number))
+
+    def is_cached(self, key: str) -> bool:
+        """Whether key has a cache entry that would be served without a refresh"""
+        if self.cache is None:
+            return False
+        entry = self.cache.get_entry(key)
+        if entry is None:
+            return False
+        if self.freshness is not None:
+            return time.time() - entry[1] < self.freshness.soft_ttl
+        return entry[2] > time.time()
+
+    def prefetch_bins(self, bins: Sequence[str], rate: float = 20, workers: int = 4,
+                      max_seconds: float = None) -> Dict[str, int]:
+        """
+        Warm the cache for many BINs through a rate-limited batch path
+
+        BINs already cached are skipped; the rest are looked up by a small
+        thread pool at no more than `rate` requests per second.
+
+        Args:
+            bins: BIN numbers, most important first
+            rate: Maximum upstream lookups per second
+            workers: Concurrent lookups
+            max_seconds: Stop scheduling lookups after this long
+
+        Returns:
+            Dict with requested, cached, fetched, failed and skipped counts
+        """
+        if self.cache is None:
+            raise ValueError("prefetch_bins requires a cache")
+
+        missing = [bin_number for bin_number in bins if not self.is_cached(bin_number)]
+        summary = {'requested': len(bins), 'cached': len(bins) - len(missing),
+                   'fetched': 0, 'failed': 0, 'skipped': 0}
+
+        started = time.monotonic()
+        interval = 1.0 / rate
+        next_start = started
+        futures = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for position, bin_number in enumerate(missing):
+                now = time.monotonic()
+                if max_seconds is not None and now - started >= max_seconds:
+                    summary['skipped'] = len(missing) - position
+                    break
+                if next_start > now:
+                    time.sleep(next_start - now)
+                next_start = max(next_start, now) + interval
+                futures.append(executor.submit(self.lookup_bin, bin_number))
+
+            for future in futures:
+                try:
+                    future.result()
+                    summary['fetched'] += 1
+                except Exception:
+                    summary['failed'] += 1
+
+        return summary
+
+    def lookup_bins(self, bins: Sequence[str], workers: int = 8) -> Dict[str, Union[Dict, Exception]]:
+        """
+        Look up many BINs through the cheapest bulk path available
+
+        Duplicates are resolved once and cached BINs are served from the
+        cache. With a batch endpoint configured (e.g. on a local stand-in),
+        the rest go out in one POST. Otherwise they are grouped by 6-digit
+        prefix and each group is resolved longest BIN first: a range-granular
+        cache can then answer the group's shorter BINs from that one result.
+        Groups run concurrently on the connection pool.
+
+        Args:
+            bins: BIN numbers (6-8 digits)
+            workers: Concurrent upstream requests
+
+        Returns:
+            Dict mapping each BIN to its result, or to the exception it raised
+        """
+        results: Dict[str, Union[Dict, Exception]] = {}
+        groups: Dict[str, List[str]] = {}
+        for bin_number in dict.fromkeys(bins):
+            if self._uncovered(bin_number):
+                results[bin_number] = ValueError("Not Found: No account range covers this BIN")
+            elif self.is_cached(bin_number):
+                results[bin_number] = self.lookup_bin(bin_number)
+            else:
+                groups.setdefault(bin_number[:6], []).append(bin_number)
+
+        if not groups:
+            return results
+
+        if self.batch_endpoint:
+            missing = [bin_number for group in groups.values() for bin_number in group]
+            results.update(self._lookup_batch_endpoint(missing))
+            return results
+
+        def resolve_group(group: List[str]) -> Dict[str, Union[Dict, Exception]]:
+            resolved = {}
+            for bin_number in sorted(group, key=len, reverse=True):
+                try:
+                    resolved[bin_number] = self.lookup_bin(bin_number)
+                except Exception as e:
+                    resolved[bin_number] = e
+            return resolved
+
+        with ThreadPoolExecutor(max_workers=min(workers, len(groups))) as executor:
+            for resolved in executor.map(resolve_group, groups.values()):
+                results.update(resolved)
+        return results
+
+    def _lookup_batch_endpoint(self, bins: List[str]) -> Dict[str, Union[Dict, Exception]]:
+        """POST {"binNumbers": [...]} and expect {"results": {bin: range data or null}}"""
+        try:
+            response = self._make_request('POST', self.batch_endpoint, data={'binNumbers': bins})
+        except Exception as e:
+            return {bin_number: e for bin_number in bins}
+
+        found = response.get('results') or {}
+        results: Dict[str, Union[Dict, Exception]] = {}
+        for bin_number in bins:
+            result = found.get(bin_number)
+            if result is None:
+                results[bin_number] = ValueError("Not Found: Endpoint or resource not found")
+                continue
+            self._store(bin_number, result)
+            results[bin_number] = result
+        return results
+
+    def _cached(self, key: str, loader):
+        """Serve key from the cache if configured, calling loader on a miss"""
+        if self.cache is None:
+            return loader()
+
+        if self.freshness is not None:
+            return self.freshness.fetch(self.cache, key, loader,
+                                        stale_on=(RateLimitError, UpstreamUnavailableError))
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = loader()
+        if result is not None:
+            self._store(key, result)
+        return result
+
+    def _store(self, key: str, result: Dict) -> None:
+        """Write a fetched result to the cache under the active freshness policy"""
+        if self.cache is None:
+            return
+        if self.freshness is not None:
+            self.freshness.store(self.cache, key, result)
+        else:
+            self.cache.set(key, result)
     
     def get_bin_details(self, account_range_low: str, account_range_high: str) -> Dict:
         """
@@ -184,6 +510,141 @@ class BINValidator:
         # Take first 6-8 digits
         return clean_bin[:8] if len(clean_bin) >= 6 else clean_bin
     
+    # Rows processed per vectorized pass; bounds the size of the digit matrix
+    BATCH_CHUNK_SIZE = 65536
+
+    @staticmethod
+    def _as_char_array(values) -> np.ndarray:
+        """Convert a sequence of str/bytes into a fixed-width NumPy string array"""
+        arr = np.asarray(values)
+        if arr.ndim != 1:
+            arr = arr.reshape(-1)
+        if arr.dtype.kind in ('i', 'u'):
+            arr = arr.astype(str)
+        elif arr.dtype.kind not in ('U', 'S'):
+            # Mixed or object input: anything that is not str/bytes is treated as empty
+            arr = np.array([v.decode('latin-1') if isinstance(v, bytes) else
+                            v if isinstance(v, str) else ''
+                            for v in arr.tolist()], dtype=str)
+        return arr
+
+    @staticmethod
+    def _digit_runs(chunk) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        The ASCII digits of a chunk of values, packed end to end
+
+        Returns:
+            Tuple of (uint8 digit values, offset of each row's first digit,
+            digit count of each row); values between rows are zero
+        """
+        if not isinstance(chunk, np.ndarray):
+            # One join + encode instead of building a fixed-width array string by
+            # string; NUL separators mark rows and non-ASCII encodes to bytes >= 0x80
+            try:
+                data = np.frombuffer('\x00'.join(chunk).encode('utf-8', 'replace'), dtype=np.uint8)
+            except TypeError:
+                data = None  # not all str
+            if data is not None:
+                digits = data - 48
+                packed = digits[(digits < 10) | (data == 0)]
+                separators = np.flatnonzero(packed == 208)  # NUL - 48, wrapped
+                if len(separators) == len(chunk) - 1:
+                    # Separators stay in place (zeroed); rows never read past their count
+                    packed[separators] = 0
+                    starts = np.concatenate(([0], separators + 1))
+                    return packed, starts, np.append(separators, len(packed)) - starts
+            # A value contains NUL or is not a str: use a fixed-width array instead
+
+        chars = BINValidator._as_char_array(chunk)
+        n = len(chars)
+        width = chars.dtype.itemsize // (4 if chars.dtype.kind == 'U' else 1)
+        if width == 0:
+            return np.zeros(0, dtype=np.uint8), np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.int64)
+        # Character codes minus '0' wrap around for anything below it, so a
+        # single unsigned compare identifies the ASCII digits
+        codes = chars.view(np.uint32 if chars.dtype.kind == 'U' else np.uint8).reshape(n, width) - 48
+        is_digit = codes < 10
+        counts = is_digit.sum(axis=1)
+        return codes[is_digit].astype(np.uint8), np.cumsum(counts) - counts, counts
+
+    @staticmethod
+    def _clean_chunk(chunk, bin_length: int, luhn: bool):
+        """Extract BIN integers, digit counts and Luhn results for one chunk"""
+        digits, offsets, digit_count = BINValidator._digit_runs(chunk)
+        if not len(digits):
+            return np.zeros(len(offsets), dtype=np.int64), digit_count, np.zeros(len(offsets), dtype=bool)
+
+        # Only the first bin_length digits of each row make up the BIN: accumulate them
+        # zero-padded on the right (int32 holds 8 digits), then drop the padding
+        kept = np.minimum(digit_count, bin_length).astype(np.int32)
+        offsets = offsets.astype(np.int32)
+        last = np.int32(len(digits) - 1)
+        bins = np.zeros(len(offsets), dtype=np.int32)
+        for position in range(bin_length):
+            digit = digits[np.minimum(offsets + position, last)] * (position < kept)
+            bins = bins * 10 + digit
+        bins = bins // (10 ** (bin_length - kept))
+
+        if not luhn:
+            return bins, digit_count, None
+
+        # Double every second digit counting back from the rightmost (check) digit.
+        # Longer rows fail the 12-19 digit rule anyway, so 19 steps cover every PAN.
+        doubled_digit = np.array([0, 2, 4, 6, 8, 1, 3, 5, 7, 9], dtype=np.uint8)
+        by_position = (digits, doubled_digit[digits])
+        ends = offsets + digit_count.astype(np.int32)
+        checksum = np.zeros(len(offsets), dtype=np.int32)
+        for position in range(19):
+            index = np.maximum(ends - 1 - position, 0)
+            checksum += by_position[position & 1][index] * (position < digit_count)
+        return bins, digit_count, checksum % 10 == 0
+
+    @staticmethod
+    def clean_bins(values: Sequence[Union[str, bytes]],
+                   bin_length: int = 8,
+                   luhn: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Clean, validate and truncate many BINs (or PANs) in one vectorized pass
+
+        Args:
+            values: Sequence or NumPy array of str/bytes (non-digits are ignored)
+            bin_length: Number of leading digits to keep (6 or 8)
+            luhn: Treat values as full PANs (12-19 digits) and require a valid
+                Luhn check digit instead of applying the 6-8 digit BIN rule
+
+        Returns:
+            Tuple of (int64 array of BINs, bool validity mask). Invalid rows are 0.
+            As with clean_bin, a 6 or 7 digit input keeps all of its digits.
+        """
+        if bin_length not in (6, 8):
+            raise ValueError("bin_length must be 6 or 8")
+
+        if isinstance(values, np.ndarray):
+            values = BINValidator._as_char_array(values)
+        elif not isinstance(values, (list, tuple)):
+            values = list(values)
+        total = len(values)
+        bins = np.zeros(total, dtype=np.int64)
+        valid = np.zeros(total, dtype=bool)
+
+        step = BINValidator.BATCH_CHUNK_SIZE
+        for start in range(0, total, step):
+            chunk = values[start:start + step]
+            chunk_bins, digit_count, luhn_ok = BINValidator._clean_chunk(chunk, bin_length, luhn)
+            if luhn:
+                ok = (digit_count >= 12) & (digit_count <= 19) & luhn_ok
+            else:
+                ok = (digit_count >= 6) & (digit_count <= 8)
+            bins[start:start + step] = np.where(ok, chunk_bins, 0)
+            valid[start:start + step] = ok
+
+        return bins, valid
+
+    @staticmethod
+    def are_valid_bins(values: Sequence[Union[str, bytes]]) -> np.ndarray:
+        """Vectorized equivalent of is_valid_bin, returning a bool mask"""
+        return BINValidator.clean_bins(values)[1]
+
     @staticmethod
     def format_card_number(card_number: str) -> str:
         """Format card number with spaces for display"""
@@ -205,4 +666,4 @@ class BINValidator:
 def create_bin_client() -> BINLookupClient:
     """Factory function to create BINLookupClient with environment configuration"""
     auth = create_mastercard_auth()
-    return BINLookupClient(auth)
\ No newline at end of file
+    return BINLookupClient(auth, cache=create_bin_cache(), freshness=create_freshness_policy())
\ No newline at end of file
@@ -0,0 +1,526 @@
+"""
+BIN Range Records
+Compact in-memory representations of account range data from /bin-ranges
+"""
+
+import codecs
+import json
+import os
+import re
+import struct
+import sys
+from array import array
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+LOW_KEY = 'lowAccountRange'
+HIGH_KEY = 'highAccountRange'
+
+# API field name -> BINRange attribute for the categorical fields we know about
+CATEGORICAL_FIELDS = {
+    'issuerName': 'issuer_name',
+    'countryCode': 'country_code',
+    'productType': 'product_type',
+    'cardType': 'card_type',
+    'issuerCountry': 'issuer_country',
+    'productSubType': 'product_sub_type',
+}
+
+# Columnar snapshot files written by BINRangeTable.save
+SNAPSHOT_MAGIC = b'BINRTBL\x00'
+SNAPSHOT_VERSION = 1
+
+# Key layouts are shared between records, so each distinct key order is stored once
+_key_layouts: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def _intern_layout(keys: Tuple[str, ...]) -> Tuple[str, ...]:
+    return _key_layouts.setdefault(keys, tuple(sys.intern(k) for k in keys))
+
+
+def _intern_value(value: Any) -> Any:
+    return sys.intern(value) if type(value) is str else value
+
+
+def _dictionary_key(value: Any) -> Tuple[type, Any]:
+    # Key on the type too so that True and 1 get separate codes
+    return (type(value), value) if getattr(value, '__hash__', None) else (type(value), repr(value))
+
+
+def parse_account_range(value: Any) -> Tuple[int, int]:
+    """Parse an account range bound into (integer value, digit length)"""
+    text = str(value)
+    if not text.isdigit():
+        raise ValueError(f"Account range must be numeric: {value!r}")
+    return int(text), len(text)
+
+
+def _narrow_codes(column: array, distinct: int) -> array:
+    """Copy a code column into the smallest unsigned type that holds `distinct` codes"""
+    typecode = 'B' if distinct <= 0xFF else 'H' if distinct <= 0xFFFF else 'I'
+    if typecode == column.typecode:
+        return column
+    return array(typecode, np.frombuffer(column, dtype=np.uint32).astype(np.dtype(typecode)).tobytes())
+
+
+def _widen_codes(column: array) -> array:
+    if column.typecode == 'I':
+        return column
+    return array('I', np.frombuffer(column, dtype=np.dtype(column.typecode)).astype(np.uint32).tobytes())
+
+
+class BINRange:
+    """Account range record with integer bounds and interned categorical fields"""
+
+    __slots__ = ('low', 'high', 'length', 'issuer_name', 'country_code', 'product_type',
+                 'card_type', 'issuer_country', 'product_sub_type', 'extra', '_keys')
+
+    def __init__(self, low: int, high: int, length: int = 16,
+                 issuer_name: str = None, country_code: str = None, product_type: str = None,
+                 card_type: str = None, issuer_country: str = None, product_sub_type: str = None,
+                 extra: Dict[str, Any] = None, keys: Tuple[str, ...] = None):
+        if low > high:
+            raise ValueError(f"Account range low bound exceeds high bound: {low}-{high}")
+        self.low = low
+        self.high = high
+        self.length = length
+        self.issuer_name = _intern_value(issuer_name)
+        self.country_code = _intern_value(country_code)
+        self.product_type = _intern_value(product_type)
+        self.card_type = _intern_value(card_type)
+        self.issuer_country = _intern_value(issuer_country)
+        self.product_sub_type = _intern_value(product_sub_type)
+        self.extra = extra or None
+        if keys is None:
+            keys = (LOW_KEY, HIGH_KEY) + tuple(
+                key for key, attr in CATEGORICAL_FIELDS.items() if getattr(self, attr) is not None
+            ) + tuple(extra or ())
+        self._keys = _intern_layout(keys)
+
+    @classmethod
+    def from_dict(cls, range_data: Dict[str, Any]) -> 'BINRange':
+        """Build a record from an API range dict"""
+        low, length = parse_account_range(range_data[LOW_KEY])
+        high, high_length = parse_account_range(range_data[HIGH_KEY])
+        if high_length != length:
+            raise ValueError(f"Account range bounds differ in length: "
+                             f"{range_data[LOW_KEY]}-{range_data[HIGH_KEY]}")
+
+        fields = {}
+        extra = {}
+        for key, value in range_data.items():
+            if key in CATEGORICAL_FIELDS:
+                fields[CATEGORICAL_FIELDS[key]] = value
+            elif key not in (LOW_KEY, HIGH_KEY):
+                extra[key] = _intern_value(value)
+
+        return cls(low, high, length, extra=extra, keys=tuple(range_data), **fields)
+
+    @property
+    def low_account_range(self) -> str:
+        return str(self.low).zfill(self.length)
+
+    @property
+    def high_account_range(self) -> str:
+        return str(self.high).zfill(self.length)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Read a field by its API name, like dict.get on the original response"""
+        if key == LOW_KEY:
+            return self.low_account_range
+        if key == HIGH_KEY:
+            return self.high_account_range
+        if key in CATEGORICAL_FIELDS:
+            value = getattr(self, CATEGORICAL_FIELDS[key])
+            return default if value is None and key not in self._keys else value
+        return self.extra.get(key, default) if self.extra else default
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert back to the API's JSON shape, preserving key order"""
+        return {key: self.get(key) for key in self._keys}
+
+    def contains(self, account_number: str) -> bool:
+        """Check whether every account number starting with this prefix is in range"""
+        padding = self.length - len(account_number)
+        if padding < 0:
+            return False
+        first = int(account_number) * 10 ** padding
+        return self.low <= first and first + 10 ** padding - 1 <= self.high
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, BINRange):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __hash__(self) -> int:
+        # Equal records share these fields; extra is left out as it may hold unhashable JSON values
+        return hash((self.low, self.high, self.length) +
+                    tuple(getattr(self, attr) for attr in CATEGORICAL_FIELDS.values()))
+
+    def __repr__(self) -> str:
+        return (f"BINRange({self.low_account_range}-{self.high_account_range}, "
+                f"{self.issuer_name!r}, {self.country_code!r}, {self.product_type!r})")
+
+
+class BINRangeTable:
+    """
+    Column-oriented store of account ranges
+
+    Bounds live in unsigned 64-bit arrays and every other field is dictionary
+    encoded: each column holds small integer codes into a list of distinct
+    values, so repeated issuers, countries and product types cost 4 bytes per
+    row instead of a string object each.
+    """
+
+    # Code 0 in every categorical column means "key absent"
+    ABSENT = 0
+
+    def __init__(self, ranges: Iterable = ()):
+        self.low = array('Q')
+        self.high = array('Q')
+        self.length = array('B')
+        self.layout = array('H')
+        self.columns: Dict[str, array] = {}
+        self.dictionaries: Dict[str, List[Any]] = {}
+        self._dictionary_index: Dict[str, Dict[Any, int]] = {}
+        self._layouts: List[Tuple[str, ...]] = []
+        self._layout_index: Dict[Tuple[str, ...], int] = {}
+
+        self.extend(ranges)
+
+    def __len__(self) -> int:
+        return len(self.low)
+
+    def __iter__(self) -> Iterator[BINRange]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getitem__(self, index: int) -> BINRange:
+        if index < 0:
+            index += len(self)
+        return BINRange.from_dict(self.row_dict(index))
+
+    def _encode(self, key: str, value: Any) -> int:
+        index = self._dictionary_index.get(key)
+        if index is None:
+            index = self._dictionary_index[key] = {}
+            self.dictionaries[key] = [None]
+            self.columns[key] = array('I', bytes(4 * len(self.low)))
+
+        lookup = _dictionary_key(value)
+        code = index.get(lookup)
+        if code is None:
+            code = index[lookup] = len(self.dictionaries[key])
+            self.dictionaries[key].append(_intern_value(value))
+        return code
+
+    def append(self, range_data) -> None:
+        """Add one range (API dict or BINRange) to the table"""
+        if isinstance(range_data, BINRange):
+            range_data = range_data.to_dict()
+
+        low, length = parse_account_range(range_data[LOW_KEY])
+        high, _ = parse_account_range(range_data[HIGH_KEY])
+
+        keys = tuple(range_data)
+        layout = self._layout_index.get(keys)
+        if layout is None:
+            layout = self._layout_index[keys] = len(self._layouts)
+            self._layouts.append(_intern_layout(keys))
+
+        codes = {key: self._encode(key, value) for key, value in range_data.items()
+                 if key not in (LOW_KEY, HIGH_KEY)}
+
+        self.low.append(low)
+        self.high.append(high)
+        self.length.append(length)
+        self.layout.append(layout)
+        for key, column in self.columns.items():
+            column.append(codes.get(key, self.ABSENT))
+
+    def extend(self, ranges: Iterable) -> None:
+        for range_data in ranges:
+            self.append(range_data)
+
+    def value(self, key: str, index: int) -> Any:
+        """Decode a single categorical field for one row"""
+        column = self.columns.get(key)
+        return self.dictionaries[key][column[index]] if column is not None else None
+
+    def where(self, key: str, predicate: Callable[[Any], bool]) -> np.ndarray:
+        """
+        Boolean row mask of the rows whose `key` value satisfies predicate
+
+        The predicate runs once per distinct value, not once per row; rows
+        without the key never match.
+        """
+        column = self.columns.get(key)
+        if column is None:
+            return np.zeros(len(self), dtype=bool)
+        codes = [code for code, value in enumerate(self.dictionaries[key]) if code and predicate(value)]
+        return np.isin(np.frombuffer(column, dtype=np.uint32), codes)
+
+    def row_dict(self, index: int) -> Dict[str, Any]:
+        """Rebuild the API's JSON shape for one row"""
+        length = self.length[index]
+        row = {}
+        for key in self._layouts[self.layout[index]]:
+            if key == LOW_KEY:
+                row[key] = str(self.low[index]).zfill(length)
+            elif key == HIGH_KEY:
+                row[key] = str(self.high[index]).zfill(length)
+            else:
+                row[key] = self.dictionaries[key][self.columns[key][index]]
+        return row
+
+    def to_dicts(self) -> Iterator[Dict[str, Any]]:
+        for index in range(len(self)):
+            yield self.row_dict(index)
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Report the memory held by the table
+
+        Returns:
+            Dict with row count and byte sizes of the bound, code and dictionary storage
+        """
+        bound_bytes = sum(col.itemsize * len(col) for col in (self.low, self.high, self.length, self.layout))
+        code_bytes = sum(col.itemsize * len(col) for col in self.columns.values())
+        dictionary_bytes = sum(sys.getsizeof(values) + sum(sys.getsizeof(v) for v in values)
+                               for values in self.dictionaries.values())
+        total = bound_bytes + code_bytes + dictionary_bytes
+        return {
+            'rows': len(self),
+            'bound_bytes': bound_bytes,
+            'code_bytes': code_bytes,
+            'dictionary_bytes': dictionary_bytes,
+            'total_bytes': total,
+            'bytes_per_row': total // len(self) if len(self) else 0,
+        }
+
+    @classmethod
+    def from_client(cls, client, size: int = 100) -> 'BINRangeTable':
+        """Build a table from every range returned by the client's /bin-ranges pages"""
+        return cls(client.iter_account_ranges(size=size))
+
+    def save(self, path: str) -> int:
+        """
+        Write the table to a columnar binary snapshot
+
+        The file is a JSON header (layouts, dictionaries, column offsets)
+        followed by the raw column arrays, 8-byte aligned. Code columns are
+        narrowed to the smallest width their dictionary allows. Written to a
+        temporary file and renamed, so readers never see a partial snapshot.
+
+        Args:
+            path: Destination file; load it back with BINRangeTable.load or load_range_snapshot
+
+        Returns:
+            Size of the file in bytes
+        """
+        columns = [('low', self.low), ('high', self.high), ('length', self.length), ('layout', self.layout)]
+        for key, column in self.columns.items():
+            columns.append((key, _narrow_codes(column, len(self.dictionaries[key]))))
+
+        offset = 0
+        descriptors = []
+        for name, column in columns:
+            size = column.itemsize * len(column)
+            descriptors.append({'name': name, 'typecode': column.typecode, 'offset': offset, 'size': size})
+            offset += size + (-size % 8)
+
+        header = json.dumps({
+            'version': SNAPSHOT_VERSION,
+            'byteorder': sys.byteorder,
+            'rows': len(self),
+            'layouts': self._layouts,
+            'dictionaries': self.dictionaries,
+            'columns': descriptors,
+        }, separators=(',', ':')).encode('utf-8')
+        header += b' ' * (-(len(SNAPSHOT_MAGIC) + 4 + len(header)) % 8)
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            for descriptor, (_, column) in zip(descriptors, columns):
+                f.write(column.tobytes())
+                f.write(bytes(-descriptor['size'] % 8))
+            size = f.tell()
+        os.replace(tmp_path, path)
+        return size
+
+    @classmethod
+    def load(cls, path: str) -> 'BINRangeTable':
+        """Read a table written by save(); columns are copied straight from the file"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ValueError(f"Not a range table snapshot: {path}")
+        start = len(SNAPSHOT_MAGIC) + 4
+        (header_size,) = struct.unpack_from('<I', data, len(SNAPSHOT_MAGIC))
+        header = json.loads(data[start:start + header_size])
+        if header['version'] != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported range table snapshot version: {header['version']}")
+
+        body = memoryview(data)[start + header_size:]
+        table = cls()
+        for descriptor in header['columns']:
+            column = array(descriptor['typecode'])
+            column.frombytes(body[descriptor['offset']:descriptor['offset'] + descriptor['size']])
+            if header['byteorder'] != sys.byteorder:
+                column.byteswap()
+            name = descriptor['name']
+            if name in ('low', 'high', 'length', 'layout'):
+                setattr(table, name, column)
+            else:
+                table.columns[name] = _widen_codes(column)
+
+        table._layouts = [_intern_layout(tuple(keys)) for keys in header['layouts']]
+        table._layout_index = {keys: index for index, keys in enumerate(table._layouts)}
+        for key, values in header['dictionaries'].items():
+            values = [_intern_value(value) for value in values]
+            table.dictionaries[key] = values
+            # Rebuilt so the loaded table can still be appended to
+            table._dictionary_index[key] = {_dictionary_key(value): code
+                                            for code, value in enumerate(values) if code}
+        return table
+
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_decoder = json.JSONDecoder()
+_NUMBER_CONTINUATION = set('0123456789.eE+-') | {''}
+
+
+class _JSONStream:
+    """Text buffer over an iterable of str or UTF-8 byte chunks, refilled on demand"""
+
+    def __init__(self, chunks: Iterable):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        # Consumed text is dropped here, so the buffer stays around one chunk
+        for chunk in self._chunks:
+            if isinstance(chunk, bytes):
+                chunk = self._utf8.decode(chunk)
+            if chunk:
+                self.text = self.text[self.pos:] + chunk
+                self.pos = 0
+                return True
+        self.eof = True
+        return False
+
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it; '' at end of input"""
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text) or self.eof or not self.fill():
+                return self.text[self.pos:self.pos + 1]
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Malformed JSON stream: expected one of {chars!r}, got {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+                # A number cut by a chunk boundary decodes early ("2." as 2), so
+                # only trust it once a delimiter follows
+                if (self.eof or not isinstance(value, (int, float))
+                        or self.text[end:end + 1] not in _NUMBER_CONTINUATION):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+
+def iter_json_array(chunks: Iterable, key: str = 'content',
+                    info: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+    """
+    Incrementally parse a JSON array, yielding each element as soon as it is complete
+
+    The document may be the array itself or an object holding it under `key`
+    (a /bin-ranges page). Only the element being parsed is buffered, so peak
+    memory is one record plus one chunk rather than the whole body.
+
+    Args:
+        chunks: str or bytes pieces of the document, e.g. response.iter_content()
+        key: Object member holding the array
+        info: If given, receives the object's other top-level members
+              (complete once the generator is exhausted)
+
+    Yields:
+        Array elements in document order
+    """
+    stream = _JSONStream(chunks)
+    if stream.expect('{[') == '[':
+        yield from _iter_array_items(stream)
+        return
+
+    if stream.peek() == '}':
+        stream.pos += 1
+        return
+    while True:
+        name = stream.value()
+        if not isinstance(name, str):
+            raise ValueError(f"Malformed JSON stream: object key must be a string, got {name!r}")
+        stream.expect(':')
+        if name == key and stream.peek() == '[':
+            stream.pos += 1
+            yield from _iter_array_items(stream)
+        else:
+            value = stream.value()
+            if info is not None:
+                info[name] = value
+        if stream.expect(',}') == '}':
+            return
+
+
+def _iter_array_items(stream: _JSONStream) -> Iterator[Any]:
+    # Called just after the opening '['; consumes the closing ']'
+    if stream.peek() == ']':
+        stream.pos += 1
+        return
+    while True:
+        yield stream.value()
+        if stream.expect(',]') == ']':
+            return
+
+
+def load_range_snapshot(path: str) -> BINRangeTable:
+    """
+    Load a range table from a snapshot file
+
+    Columnar binary snapshots (BINRangeTable.save) are recognised by their
+    magic bytes. Files ending in .ndjson or .jsonl hold one range dict per
+    line. Anything else is streamed as JSON: either an array of ranges or a
+    /bin-ranges page ({"content": [...]}).
+
+    Args:
+        path: Path to the snapshot file
+
+    Returns:
+        BINRangeTable with every range in the snapshot
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC:
+            return BINRangeTable.load(path)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(('.ndjson', '.jsonl')):
+            return BINRangeTable(json.loads(line) for line in f if line.strip())
+
+        return BINRangeTable(iter_json_array(iter(lambda: f.read(65536), '')))
@@ -5,8 +5,12 @@ This version provides mock data for demonstration purposes
 
 from flask import Flask, render_template, request, jsonify
 import json
+import os
 import time
 import random
+import numpy as np
+from bin_index import BINRangeResolver
+from bin_ranges import load_range_snapshot
 
 app = Flask(__name__)
 app.secret_key = 'demo-secret-key'
@@ -135,6 +139,31 @@ MOCK_ACCOUNT_RANGES = [
     }
 ]
 
+# Optional large dataset (e.g. from synthetic_ranges.py) replacing the samples above
+DEMO_RANGE_DATASET = os.getenv('DEMO_RANGE_DATASET')
+range_table = load_range_snapshot(DEMO_RANGE_DATASET) if DEMO_RANGE_DATASET else None
+range_resolver = BINRangeResolver(range_table) if range_table is not None else None
+
+# Artificial API delays; turn off to measure real query latency
+SIMULATE_LATENCY = os.getenv('DEMO_SIMULATE_LATENCY', 'True').lower() == 'true'
+
+
+def simulate_latency(low: float, high: float) -> None:
+    if SIMULATE_LATENCY:
+        time.sleep(random.uniform(low, high))
+
+
+def search_range_table(issuer_name: str, country_code: str, product_type: str) -> np.ndarray:
+    """Row indexes of range_table matching the search criteria"""
+    matches = np.ones(len(range_table), dtype=bool)
+    criteria = [('issuerName', lambda value: issuer_name in str(value).lower(), issuer_name),
+                ('countryCode', lambda value: value == country_code, country_code),
+                ('productType', lambda value: value == product_type, product_type)]
+    for key, predicate, wanted in criteria:
+        if wanted:
+            matches &= range_table.where(key, predicate)
+    return np.flatnonzero(matches)
+
 
 @app.route('/')
 def index():
@@ -147,7 +176,7 @@ def lookup_bin():
     """Handle BIN lookup requests with mock data"""
     try:
         # Add artificial delay to simulate API call
-        time.sleep(random.uniform(0.5, 1.5))
+        simulate_latency(0.5, 1.5)
         
         data = request.get_json()
         bin_number = data.get('bin_number', '').strip()
@@ -162,8 +191,15 @@ def lookup_bin():
         # Clean BIN number (take first 6 digits for lookup)
         clean_bin = bin_number[:6]
         
+        # Resolve against the loaded dataset, if any
+        if range_resolver is not None:
+            match = range_resolver.resolve(bin_number)
+            if match is None:
+                return jsonify({'error': 'No account range covers this BIN'}), 404
+            result = match.to_dict()
+            clean_bin = bin_number
         # Check if we have mock data for this BIN
-        if clean_bin in MOCK_BIN_DATA:
+        elif clean_bin in MOCK_BIN_DATA:
             result = MOCK_BIN_DATA[clean_bin].copy()
         else:
             # Generate mock data for unknown BINs
@@ -195,7 +231,7 @@ def get_ranges():
     """Get account ranges with pagination - mock data"""
     try:
         # Add artificial delay
-        time.sleep(random.uniform(0.3, 0.8))
+        simulate_latency(0.3, 0.8)
         
         page = request.args.get('page', 1, type=int)
         size = request.args.get('size', 25, type=int)
@@ -208,11 +244,15 @@ def get_ranges():
             size = 25
         
         # Calculate pagination
-        total_elements = len(MOCK_ACCOUNT_RANGES)
+        ranges = MOCK_ACCOUNT_RANGES if range_table is None else range_table
+        total_elements = len(ranges)
         start_idx = (page - 1) * size
         end_idx = start_idx + size
         
-        content = MOCK_ACCOUNT_RANGES[start_idx:end_idx]
+        if range_table is None:
+            content = MOCK_ACCOUNT_RANGES[start_idx:end_idx]
+        else:
+            content = [range_table.row_dict(i) for i in range(start_idx, min(end_idx, total_elements))]
         
         result = {
             'content': content,
@@ -239,7 +279,7 @@ def search_bins():
     """Search BINs based on criteria - mock data"""
     try:
         # Add artificial delay
-        time.sleep(random.uniform(0.4, 1.0))
+        simulate_latency(0.4, 1.0)
         
         issuer_name = request.args.get('issuer_name', '').lower()
         country_code = request.args.get('country_code', '').upper()
@@ -250,7 +290,7 @@ def search_bins():
         # Filter mock data based on criteria
         filtered_ranges = []
         
-        for range_data in MOCK_ACCOUNT_RANGES:
+        for range_data in (MOCK_ACCOUNT_RANGES if range_table is None else []):
             match = True
             
             if issuer_name and issuer_name not in range_data.get('issuerName', '').lower():
@@ -265,12 +305,17 @@ def search_bins():
             if match:
                 filtered_ranges.append(range_data)
         
+        if range_table is not None:
+            filtered_ranges = search_range_table(issuer_name, country_code, product_type)
+
         # Calculate pagination
         total_elements = len(filtered_ranges)
         start_idx = (page - 1) * size
         end_idx = start_idx + size
         
         content = filtered_ranges[start_idx:end_idx]
+        if range_table is not None:
+            content = [range_table.row_dict(int(i)) for i in content]
         
         result = {
             'content': content,
@@ -299,7 +344,8 @@ def health_check():
         'status': 'healthy', 
         'message': 'Demo API is ready',
         'demo_mode': True,
-        'available_sample_bins': list(MOCK_BIN_DATA.keys())
+        'available_sample_bins': list(MOCK_BIN_DATA.keys()),
+        'dataset_ranges': len(range_table) if range_table is not None else 0
     })
 
 
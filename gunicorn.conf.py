@@ -0,0 +1,51 @@
+"""
+Gunicorn configuration for production
+
+    gunicorn -c gunicorn.conf.py
+
+One process per core, each with a pool of threads. The app is preloaded in
+the master so the range snapshot is read once and shared copy-on-write by
+every worker; each worker then creates its own client, connection pool and
+background threads in post_worker_init.
+"""
+
+import multiprocessing
+import os
+
+# Tell create_app to leave per-process state to post_worker_init below
+os.environ.setdefault('WORKER_INIT', 'post_fork')
+
+wsgi_app = 'app:create_app()'
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+preload_app = True
+
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+# Unset: sized in on_starting to the admission limits plus queues of every
+# route, plus THREAD_HEADROOM, so /health always finds a free thread
+threads = int(os.getenv('GUNICORN_THREADS', 0))
+THREAD_HEADROOM = 4
+
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+
+
+def on_starting(server):
+    """Size the thread pool from the preloaded app's admission limits"""
+    app = server.app.wsgi()
+    admission = app.extensions.get('admission_control')
+    if admission is None:
+        server.cfg.set('threads', server.cfg.threads or 32)
+        return
+    demand = admission.thread_demand(rule.endpoint for rule in app.url_map.iter_rules())
+    if not server.cfg.threads:
+        server.cfg.set('threads', demand + THREAD_HEADROOM)
+    elif server.cfg.threads <= demand:
+        server.log.warning("GUNICORN_THREADS=%d: admitted and queued requests can hold %d threads, "
+                           "so /health may find none free under load", server.cfg.threads, demand)
+
+
+def post_worker_init(worker):
+    """Create the worker's BIN client and start its warm-up"""
+    worker.wsgi.extensions['bin_lookup'].start_worker()
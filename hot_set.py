@@ -0,0 +1,164 @@
+"""
+BIN Hot-Set Tracking
+Tracks the most requested BINs so caches can be pre-warmed after a deploy or flush
+"""
+
+import fcntl
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class CountMinSketch:
+    """Fixed-size frequency sketch; estimates never undercount"""
+
+    def __init__(self, width: int = 65536, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.uint32)
+        self._rows = np.arange(depth)
+
+    def _columns(self, key: str) -> np.ndarray:
+        # Double hashing: row i uses h1 + i * h2
+        h1 = hash(key)
+        h2 = hash((key, 'count-min')) | 1
+        return (h1 + self._rows * h2) % self.width
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Add count to key and return its new estimate"""
+        columns = self._columns(key)
+        self.table[self._rows, columns] += count
+        return int(self.table[self._rows, columns].min())
+
+    def estimate(self, key: str) -> int:
+        return int(self.table[self._rows, self._columns(key)].min())
+
+    def decay(self) -> None:
+        """Halve every counter so old traffic fades out"""
+        self.table >>= 1
+
+
+class HotSetTracker:
+    """
+    Top-K BINs by request frequency
+
+    Every request updates a count-min sketch; BINs whose estimate makes the
+    top `capacity` are kept as candidates. Counters are halved every
+    `decay_every` records so the hot set follows current traffic.
+    """
+
+    def __init__(self, capacity: int = 5000, width: int = 65536, depth: int = 4,
+                 decay_every: int = 1000000):
+        self.capacity = capacity
+        self.decay_every = decay_every
+        self.sketch = CountMinSketch(width, depth)
+        self.candidates: Dict[str, int] = {}
+        self.records = 0
+        self._lock = threading.Lock()
+        self._persist_thread = None
+        self._stop = threading.Event()
+
+    def record(self, bin_number: str) -> None:
+        """Count one request for bin_number"""
+        with self._lock:
+            self.candidates[bin_number] = self.sketch.add(bin_number)
+            self.records += 1
+
+            # Prune in batches so the common path stays O(1)
+            if len(self.candidates) > 2 * self.capacity:
+                self._prune()
+            if self.records % self.decay_every == 0:
+                self.sketch.decay()
+                self.candidates = {key: count >> 1 for key, count in self.candidates.items()
+                                   if count >> 1}
+
+    def _prune(self) -> None:
+        top = sorted(self.candidates.items(), key=lambda item: item[1], reverse=True)
+        self.candidates = dict(top[:self.capacity])
+
+    def top(self, limit: int = None) -> List[Tuple[str, int]]:
+        """Hottest BINs first as (bin, estimated count) pairs"""
+        with self._lock:
+            items = sorted(self.candidates.items(), key=lambda item: item[1], reverse=True)
+        return items[:limit or self.capacity]
+
+    def persist(self, path: str) -> int:
+        """
+        Merge the hot set into the file at path
+
+        Several workers share one file; each merge halves the counts already
+        in the file, then keeps the larger count per BIN, so the file follows
+        the hot set across all of them and BINs nobody requests any more fade
+        out within a few persist intervals.
+
+        Returns:
+            Number of BINs written
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        with open(f"{path}.lock", 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            merged = {bin_number: count >> 1 for bin_number, count in load_hot_set(path) if count >> 1}
+            for bin_number, count in self.top():
+                merged[bin_number] = max(count, merged.get(bin_number, 0))
+            hot = sorted(merged.items(), key=lambda item: item[1], reverse=True)[:self.capacity]
+
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(hot, f)
+            os.replace(tmp_path, path)
+        return len(hot)
+
+    def start_persisting(self, path: str, interval: float = 300) -> threading.Thread:
+        """Persist the hot set to path every interval seconds in a daemon thread"""
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.persist(path)
+                except OSError as e:
+                    logger.warning(f"Failed to persist hot set to {path}: {e}")
+
+        self._persist_thread = threading.Thread(target=loop, name='hot-set-persist', daemon=True)
+        self._persist_thread.start()
+        return self._persist_thread
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def load_hot_set(path: str, limit: int = None) -> List[Tuple[str, int]]:
+    """Read a persisted hot set, hottest first; missing or corrupt files give []"""
+    try:
+        with open(path, 'r') as f:
+            hot = [(str(bin_number), int(count)) for bin_number, count in json.load(f)]
+    except (OSError, ValueError, TypeError) as e:
+        if not isinstance(e, FileNotFoundError):
+            logger.warning(f"Ignoring unreadable hot set {path}: {e}")
+        return []
+    return hot[:limit] if limit else hot
+
+
+def prewarm_hot_set(client, path: str, limit: int = None, rate: float = 20,
+                    max_seconds: Optional[float] = None) -> Dict[str, int]:
+    """
+    Pre-fetch the persisted hot set into the client's cache
+
+    Args:
+        client: BINLookupClient with a cache configured
+        path: Hot-set file written by HotSetTracker.persist
+        limit: Only warm the hottest `limit` BINs
+        rate: Maximum upstream lookups per second
+        max_seconds: Stop after this long, leaving the rest to normal traffic
+
+    Returns:
+        Summary from BINLookupClient.prefetch_bins
+    """
+    bins = [bin_number for bin_number, _ in load_hot_set(path, limit)]
+    return client.prefetch_bins(bins, rate=rate, max_seconds=max_seconds)
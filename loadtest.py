@@ -0,0 +1,412 @@
+"""
+Load Test Harness
+Drives the app's routes at a target rate or concurrency and records latency percentiles
+
+Usage:
+    # App and stand-in upstream in this process, 200 req/s open loop for 30s
+    python loadtest.py --rate 200 --duration 30 --output results.json
+
+    # Against a running server (e.g. gunicorn) pointed at a stand-in upstream
+    python loadtest.py --serve-upstream 8081 --upstream-latency-ms 20
+    MASTERCARD_BASE_URL=http://127.0.0.1:8081 gunicorn -c gunicorn.conf.py
+    python loadtest.py --url http://127.0.0.1:5000 --concurrency 64 --baseline results.json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import accumulate
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from bin_index import BINRangeResolver
+from bin_ranges import BINRangeTable
+from synthetic_ranges import COUNTRIES, PRODUCT_TYPES, SyntheticRangeGenerator
+
+DEFAULT_MIX = 'lookup=4,lookup_skewed=4,ranges=1,search=1'
+PERCENTILES = (50, 95, 99, 99.9)
+
+
+class StandInUpstream:
+    """
+    Local stand-in for the /bin-ranges API backed by a synthetic dataset
+
+    Serves /bin-ranges pages, /bin-ranges/{bin}, /bin-ranges/search and HEAD
+    requests, sleeping `latency` seconds per GET. Signatures are not checked.
+    """
+
+    def __init__(self, table: BINRangeTable, latency: float = 0.0, port: int = 0):
+        self.table = table
+        self.resolver = BINRangeResolver(table)
+        self.latency = latency
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def start(self) -> 'StandInUpstream':
+        threading.Thread(target=self.server.serve_forever, name='stand-in-upstream', daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def page(self, rows, page: int, size: int) -> Dict:
+        content = [self.table.row_dict(int(i)) for i in rows[(page - 1) * size:page * size]]
+        return {
+            'content': content,
+            'totalElements': len(rows),
+            'totalPages': (len(rows) + size - 1) // size,
+            'number': page - 1,
+            'last': page * size >= len(rows),
+        }
+
+    def search(self, query: Dict[str, str]):
+        matches = None
+        criteria = [('issuerName', lambda value: query['issuerName'].lower() in str(value).lower()),
+                    ('countryCode', lambda value: value == query['countryCode']),
+                    ('productType', lambda value: value == query['productType'])]
+        for key, predicate in criteria:
+            if query.get(key):
+                mask = self.table.where(key, predicate)
+                matches = mask if matches is None else matches & mask
+        return range(len(self.table)) if matches is None else matches.nonzero()[0]
+
+    def _handler(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: Dict) -> None:
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def do_GET(self):
+                if upstream.latency:
+                    time.sleep(upstream.latency)
+                url = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                page = max(1, int(query.get('page', 1)))
+                size = max(1, int(query.get('size', 25)))
+
+                if url.path == '/bin-ranges':
+                    return self._send(200, upstream.page(range(len(upstream.table)), page, size))
+                if url.path == '/bin-ranges/search':
+                    return self._send(200, upstream.page(upstream.search(query), page, size))
+                if url.path.startswith('/bin-ranges/'):
+                    match = upstream.resolver.resolve(url.path.rsplit('/', 1)[1])
+                    if match is None:
+                        return self._send(404, {'message': 'No account range found'})
+                    return self._send(200, match.to_dict())
+                self._send(404, {'message': 'Not found'})
+
+        return Handler
+
+
+class Scenarios:
+    """Request generators for each route, drawing BINs and filters from the dataset"""
+
+    def __init__(self, table: BINRangeTable, seed: int = 0, zipf_s: float = 1.2):
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        # One BIN per range: 6 digits for whole 6-digit ranges, otherwise the first 8
+        self.bins = []
+        for index in range(len(table)):
+            low = str(table.low[index]).zfill(table.length[index])
+            high = str(table.high[index]).zfill(table.length[index])
+            whole_prefix = low[:6] == high[:6] and not low[6:].strip('0') and not high[6:].strip('9')
+            self.bins.append(low[:6] if whole_prefix else low[:8])
+        # Skewed traffic: a seeded permutation ranks the BINs, rank r gets weight 1/r^s
+        self.hot_bins = self.rng.sample(self.bins, len(self.bins))
+        self._hot_weights = list(accumulate(1 / rank ** zipf_s for rank in range(1, len(self.bins) + 1)))
+        self.pages = max(1, len(table) // 25)
+
+    def request(self, name: str) -> Tuple[str, str, Optional[Dict], Optional[Dict]]:
+        """(method, path, params, json body) for one request of scenario `name`"""
+        with self._lock:
+            rng = self.rng
+            if name == 'lookup':
+                return 'POST', '/lookup', None, {'bin_number': rng.choice(self.bins)}
+            if name == 'lookup_skewed':
+                bin_number = rng.choices(self.hot_bins, cum_weights=self._hot_weights)[0]
+                return 'POST', '/lookup', None, {'bin_number': bin_number}
+            if name == 'ranges':
+                return 'GET', '/ranges', {'page': rng.randint(1, min(self.pages, 1000)), 'size': 25}, None
+            if name == 'search':
+                return 'GET', '/search', {'country_code': rng.choice(COUNTRIES)[0],
+                                          'product_type': rng.choice(PRODUCT_TYPES)[0], 'size': 25}, None
+        raise ValueError(f"Unknown scenario: {name}")
+
+
+class Recorder:
+    """Collects latency and outcome per scenario"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+
+    def record(self, name: str, latency: float, error: Optional[str]) -> None:
+        with self._lock:
+            self.latencies.setdefault(name, []).append(latency)
+            if error:
+                errors = self.errors.setdefault(name, {})
+                errors[error] = errors.get(error, 0) + 1
+
+    def summary(self, elapsed: float) -> Dict:
+        def summarize(latencies: List[float], errors: Dict[str, int]) -> Dict:
+            ordered = sorted(latencies)
+            count = len(ordered)
+            failed = sum(errors.values())
+            result = {
+                'requests': count,
+                'throughput_rps': round(count / elapsed, 2) if elapsed else 0.0,
+                'error_rate': round(failed / count, 5) if count else 0.0,
+                'errors': errors,
+                'mean_ms': round(sum(ordered) / count * 1000, 3) if count else None,
+                'max_ms': round(ordered[-1] * 1000, 3) if count else None,
+            }
+            for p in PERCENTILES:
+                # Nearest-rank percentile
+                rank = max(1, math.ceil(p / 100 * count))
+                result[f"p{str(p).replace('.', '')}_ms"] = round(ordered[rank - 1] * 1000, 3) if count else None
+            return result
+
+        with self._lock:
+            scenarios = {name: summarize(latencies, self.errors.get(name, {}))
+                         for name, latencies in self.latencies.items()}
+            all_errors: Dict[str, int] = {}
+            for errors in self.errors.values():
+                for error, count in errors.items():
+                    all_errors[error] = all_errors.get(error, 0) + count
+            overall = summarize([l for latencies in self.latencies.values() for l in latencies], all_errors)
+        return {'overall': overall, 'scenarios': scenarios}
+
+
+def parse_mix(spec: str) -> Tuple[List[str], List[float]]:
+    """Parse "lookup=4,ranges=1" into scenario names and cumulative weights"""
+    names, weights = [], []
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, weight = item.partition('=')
+        names.append(name.strip())
+        weights.append(float(weight or 1))
+    return names, list(accumulate(weights))
+
+
+def run_load(base_url: str, scenarios: Scenarios, mix: str, duration: float, rate: float = None,
+             concurrency: int = None, max_in_flight: int = 256, seed: int = 0,
+             timeout: float = 30) -> Dict:
+    """
+    Send requests for `duration` seconds and summarize them
+
+    With `rate`, arrivals are open loop (Poisson at `rate` per second) and
+    latency is measured from each request's scheduled time, so a slow server
+    cannot hide its queueing by slowing the load down. With `concurrency`,
+    that many clients send back to back (closed loop).
+    """
+    names, weights = parse_mix(mix)
+    recorder = Recorder()
+    sessions = threading.local()
+    picker = random.Random(seed)
+    picker_lock = threading.Lock()
+
+    def pick() -> str:
+        with picker_lock:
+            return picker.choices(names, cum_weights=weights)[0]
+
+    def send(name: str, scheduled: float) -> None:
+        session = getattr(sessions, 'session', None)
+        if session is None:
+            session = sessions.session = requests.Session()
+        method, path, params, body = scenarios.request(name)
+        error = None
+        try:
+            response = session.request(method, base_url + path, params=params, json=body, timeout=timeout)
+            if response.status_code >= 400:
+                error = str(response.status_code)
+        except requests.exceptions.RequestException as e:
+            error = type(e).__name__
+        recorder.record(name, time.perf_counter() - scheduled, error)
+
+    started = time.perf_counter()
+    deadline = started + duration
+    if rate:
+        arrivals = random.Random(seed + 1)
+        with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='load') as executor:
+            scheduled = started
+            while True:
+                scheduled += arrivals.expovariate(rate)
+                if scheduled >= deadline:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(send, pick(), scheduled)
+    else:
+        def client() -> None:
+            while time.perf_counter() < deadline:
+                send(pick(), time.perf_counter())
+
+        threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency or 1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    return recorder.summary(time.perf_counter() - started)
+
+
+def create_signing_key(directory: str) -> str:
+    """Write a throwaway PKCS#12 RSA key (password 'loadtest') so requests are really signed"""
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.hazmat.primitives.serialization import BestAvailableEncryption, pkcs12
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    path = os.path.join(directory, 'loadtest.p12')
+    with open(path, 'wb') as f:
+        f.write(pkcs12.serialize_key_and_certificates(b'loadtest', key, None, None,
+                                                      BestAvailableEncryption(b'loadtest')))
+    return path
+
+
+def start_local_app(upstream_url: str, key_path: str,
+                    config: Dict = None) -> Tuple[str, Callable[[], None]]:
+    """Serve create_app() on a threaded local server that talks to the stand-in upstream"""
+    from werkzeug.serving import make_server
+
+    os.environ.update({
+        'MASTERCARD_CONSUMER_KEY': 'loadtest',
+        'MASTERCARD_P12_FILE_PATH': key_path,
+        'MASTERCARD_KEYSTORE_PASSWORD': 'loadtest',
+        'MASTERCARD_BASE_URL': upstream_url,
+    })
+    os.environ.pop('MASTERCARD_BASE_URLS', None)
+    from app import create_app
+
+    app = create_app({'WARMUP_ON_BOOT': False, **(config or {})})
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='loadtest-app', daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server.shutdown
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict, baseline: Dict) -> None:
+    """Print throughput and latency changes against an earlier results file"""
+    print(f"\nvs baseline {baseline['meta'].get('revision')} ({baseline['meta'].get('started_at')}):")
+    rows = [('overall', results['overall'], baseline['overall'])]
+    rows += [(name, summary, baseline['scenarios'][name])
+             for name, summary in results['scenarios'].items() if name in baseline['scenarios']]
+    for name, current, previous in rows:
+        changes = []
+        for metric in ('throughput_rps', 'p50_ms', 'p99_ms', 'p999_ms', 'error_rate'):
+            if current.get(metric) is not None and previous.get(metric):
+                changes.append(f"{metric} {(current[metric] / previous[metric] - 1) * 100:+.1f}%")
+        print(f"  {name:14} " + ', '.join(changes))
+
+
+def print_summary(results: Dict) -> None:
+    for name, summary in [('overall', results['overall'])] + sorted(results['scenarios'].items()):
+        print(f"{name:14} {summary['requests']:7d} req {summary['throughput_rps']:9.1f} rps  "
+              f"p50 {summary['p50_ms']}ms  p95 {summary['p95_ms']}ms  p99 {summary['p99_ms']}ms  "
+              f"p999 {summary['p999_ms']}ms  errors {summary['error_rate']:.2%} {summary['errors'] or ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', help='app to test; default starts one in-process')
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument('--rate', type=float, help='open-loop arrivals per second')
+    load.add_argument('--concurrency', type=int, help='closed-loop clients (default 16)')
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'scenario weights (default {DEFAULT_MIX})')
+    parser.add_argument('--max-in-flight', type=int, default=256, help='open-loop sender threads')
+    parser.add_argument('--ranges', type=int, default=20000, help='synthetic dataset size')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--upstream-latency-ms', type=float, default=0)
+    parser.add_argument('--serve-upstream', type=int, metavar='PORT',
+                        help='only run the stand-in upstream on PORT until interrupted')
+    parser.add_argument('--output', help='write JSON results here')
+    parser.add_argument('--baseline', help='earlier JSON results to compare against')
+    args = parser.parse_args()
+
+    table = BINRangeTable(SyntheticRangeGenerator(args.ranges, seed=args.seed))
+    upstream = StandInUpstream(table, latency=args.upstream_latency_ms / 1000,
+                               port=args.serve_upstream or 0).start()
+    if args.serve_upstream:
+        print(f"Stand-in upstream with {len(table)} ranges at {upstream.url}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            return
+
+    with tempfile.TemporaryDirectory() as directory:
+        base_url, stop_app = args.url, None
+        if not base_url:
+            base_url, stop_app = start_local_app(upstream.url, create_signing_key(directory))
+
+        concurrency = None if args.rate else args.concurrency or 16
+        started_at = time.strftime('%Y-%m-%dT%H:%M:%S%z')
+        results = run_load(base_url.rstrip('/'), Scenarios(table, seed=args.seed), args.mix, args.duration,
+                           rate=args.rate, concurrency=concurrency, max_in_flight=args.max_in_flight,
+                           seed=args.seed)
+        if stop_app:
+            stop_app()
+    upstream.stop()
+
+    results['meta'] = {
+        'started_at': started_at,
+        'revision': git_revision(),
+        'target': args.url or 'in-process',
+        'mode': 'open-loop' if args.rate else 'closed-loop',
+        'rate': args.rate,
+        'concurrency': concurrency,
+        'duration_s': args.duration,
+        'mix': args.mix,
+        'ranges': len(table),
+        'seed': args.seed,
+        'upstream_latency_ms': args.upstream_latency_ms,
+    }
+    print_summary(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
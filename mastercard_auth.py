@@ -9,6 +9,7 @@ import hmac
 import time
 import urllib.parse
 from cryptography.hazmat.primitives import serialization, hashes
+from cryptography.hazmat.primitives.serialization import pkcs12
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.backends import default_backend
 import secrets
@@ -28,8 +29,7 @@ class MastercardAuth:
             with open(p12_file_path, 'rb') as f:
                 p12_data = f.read()
             
-            from cryptography.hazmat.primitives import serialization
-            private_key, certificate, additional_certificates = serialization.pkcs12.load_key_and_certificates(
+            private_key, certificate, additional_certificates = pkcs12.load_key_and_certificates(
                 p12_data, 
                 keystore_password.encode('utf-8'),
                 backend=default_backend()
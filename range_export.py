@@ -0,0 +1,68 @@
+"""
+Range Export
+Chunked NDJSON/CSV encoders for streaming the account range table
+"""
+
+import csv
+import io
+import json
+import zlib
+from typing import Dict, Iterable, Iterator, Sequence
+
+from bin_ranges import CATEGORICAL_FIELDS, HIGH_KEY, LOW_KEY
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+DEFAULT_CSV_FIELDS = (LOW_KEY, HIGH_KEY) + tuple(CATEGORICAL_FIELDS)
+
+
+def _batched(lines: Iterable[str], chunk_size: int) -> Iterator[bytes]:
+    # One write per line would mean one chunk-encoded frame per range
+    buffer = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def iter_ndjson(ranges: Iterable[Dict], chunk_size: int = 65536) -> Iterator[bytes]:
+    """Encode range dicts as newline-delimited JSON, about chunk_size bytes per chunk"""
+    return _batched((json.dumps(range_data, separators=(',', ':')) + '\n' for range_data in ranges),
+                    chunk_size)
+
+
+def iter_csv(ranges: Iterable[Dict], fields: Sequence[str] = DEFAULT_CSV_FIELDS,
+             chunk_size: int = 65536) -> Iterator[bytes]:
+    """Encode range dicts as CSV with a header row; fields missing from a range are left empty"""
+    def lines() -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        for range_data in ranges:
+            writer.writerow([range_data.get(field, '') for field in fields])
+            # Drain after every row so the buffer never holds more than one line
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    return _batched(lines(), chunk_size)
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a chunk stream on the fly, flushing once at the end"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,209 @@
+"""
+Application Services
+Per-process lookup state behind the Flask app: client, batching, hot set and warm-up
+"""
+
+import logging
+import os
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Optional
+
+from admission import parse_limits
+from batching import BatchingLookup
+from hot_set import HotSetTracker
+from warmup import StartupTimer, Warmup
+
+logger = logging.getLogger(__name__)
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() == 'true'
+
+
+def load_config() -> Dict[str, Any]:
+    """Read the app's settings from the environment (see .env.example)"""
+    return {
+        'SECRET_KEY': os.getenv('FLASK_SECRET_KEY', 'your-secret-key-here'),
+        'WORKER_INIT': os.getenv('WORKER_INIT', 'eager'),
+        'WARMUP_ON_BOOT': _env_flag('WARMUP_ON_BOOT', 'True'),
+        'WARMUP_CONNECTIONS': int(os.getenv('WARMUP_CONNECTIONS', 4)),
+        'BIN_RANGE_SNAPSHOT': os.getenv('BIN_RANGE_SNAPSHOT'),
+        'BIN_COVERAGE_BITMAP': os.getenv('BIN_COVERAGE_BITMAP'),
+        'SNAPSHOT_RELOAD_INTERVAL': float(os.getenv('SNAPSHOT_RELOAD_INTERVAL', 0)),
+        'SUGGEST_LIMIT': int(os.getenv('SUGGEST_LIMIT', 10)),
+        'SUGGEST_MAX_AGE': int(os.getenv('SUGGEST_MAX_AGE', 300)),
+        'STATS_MAX_AGE': int(os.getenv('STATS_MAX_AGE', 60)),
+        'ADMISSION_CONTROL': _env_flag('ADMISSION_CONTROL', 'True'),
+        'ADMISSION_LIMITS': parse_limits(os.getenv('ADMISSION_LIMITS',
+                                                   'lookup_bin=16,get_ranges=4,search_bins=4,export_ranges=2')),
+        'ADMISSION_DEFAULT_LIMIT': int(os.getenv('ADMISSION_DEFAULT_LIMIT', 16)),
+        'ADMISSION_MAX_QUEUE': int(os.getenv('ADMISSION_MAX_QUEUE', 32)),
+        'ADMISSION_MAX_QUEUE_MS': float(os.getenv('ADMISSION_MAX_QUEUE_MS', 250)),
+        'ADMISSION_RETRY_AFTER': int(os.getenv('ADMISSION_RETRY_AFTER', 1)),
+        'LOOKUP_BATCHING': _env_flag('LOOKUP_BATCHING', 'False'),
+        'LOOKUP_BATCH_SIZE': int(os.getenv('LOOKUP_BATCH_SIZE', 32)),
+        'LOOKUP_BATCH_DELAY_MS': float(os.getenv('LOOKUP_BATCH_DELAY_MS', 5)),
+        'HOT_SET_PATH': os.getenv('HOT_SET_PATH'),
+        'HOT_SET_SIZE': int(os.getenv('HOT_SET_SIZE', 5000)),
+        'HOT_SET_PERSIST_INTERVAL': float(os.getenv('HOT_SET_PERSIST_INTERVAL', 300)),
+        'HOT_SET_PREWARM_RATE': float(os.getenv('HOT_SET_PREWARM_RATE', 20)),
+        'HOT_SET_PREWARM_SECONDS': float(os.getenv('HOT_SET_PREWARM_SECONDS', 30)),
+        'CACHE_FLUSH_TOKEN': os.getenv('CACHE_FLUSH_TOKEN'),
+    }
+
+
+class LookupServices:
+    """
+    Owns everything the routes share, split by what may cross a fork
+
+    Read-only data (the range snapshot and its index) is loaded once by
+    load_shared(); in a pre-forking server that happens in the master, so
+    workers share those pages copy-on-write. Everything holding sockets,
+    locks or threads - the client and its requests.Session, the micro-batcher,
+    the hot-set persister and the warm-up thread - is created per process by
+    start_worker(), which is a no-op when already run in the current process.
+    """
+
+    def __init__(self, config: Dict[str, Any], client_factory: Callable,
+                 timer: StartupTimer = None):
+        self.config = config
+        self.client_factory = client_factory
+        self.timer = timer or StartupTimer()
+
+        self.bin_client = None
+        self.batching_lookup = None
+        self.hot_set: Optional[HotSetTracker] = None
+        self.warmup = Warmup(
+            self.get_bin_client,
+            connections=config['WARMUP_CONNECTIONS'],
+            snapshot_path=config['BIN_RANGE_SNAPSHOT'],
+            coverage_path=config['BIN_COVERAGE_BITMAP'],
+            timer=self.timer,
+            hot_set_path=config['HOT_SET_PATH'],
+            prewarm_rate=config['HOT_SET_PREWARM_RATE'],
+            prewarm_seconds=config['HOT_SET_PREWARM_SECONDS']
+        )
+        self._lock = threading.Lock()
+        self._worker_pid = None
+        # A lock held by another thread at fork time stays locked in the child; replace it there
+        reset_lock = weakref.WeakMethod(self._reset_lock)
+
+        def after_fork():
+            method = reset_lock()
+            if method is not None:
+                method()
+        os.register_at_fork(after_in_child=after_fork)
+
+    def _reset_lock(self) -> None:
+        self._lock = threading.Lock()
+
+    def load_shared(self) -> None:
+        """Load read-only data that every worker can share (the range snapshot)"""
+        if self.config['WARMUP_ON_BOOT']:
+            self.warmup.load_snapshot()
+
+    def start_worker(self) -> None:
+        """Create this process's client state and start warm-up; run after fork"""
+        pid = os.getpid()
+        if self._worker_pid == pid:
+            return
+
+        with self._lock:
+            # Another thread may have initialized this process while we waited
+            if self._worker_pid == pid:
+                return
+
+            # Clients and threads copied from the parent are unusable here, so start afresh
+            self.bin_client = None
+            self.batching_lookup = None
+            self.warmup.reset()
+
+            if self.config['HOT_SET_PATH']:
+                self.hot_set = HotSetTracker(capacity=self.config['HOT_SET_SIZE'])
+                self.hot_set.start_persisting(self.config['HOT_SET_PATH'],
+                                              interval=self.config['HOT_SET_PERSIST_INTERVAL'])
+
+            if self.config['WARMUP_ON_BOOT']:
+                self.warmup.start()
+            if self.config['BIN_RANGE_SNAPSHOT'] and self.config['SNAPSHOT_RELOAD_INTERVAL'] > 0:
+                threading.Thread(target=self._watch_snapshot, name='snapshot-reload', daemon=True).start()
+            # Published last, so the unlocked fast path above never skips a half-done init
+            self._worker_pid = pid
+
+    def _watch_snapshot(self) -> None:
+        """Reload the range snapshot whenever its file changes, for the life of the process"""
+        while True:
+            time.sleep(self.config['SNAPSHOT_RELOAD_INTERVAL'])
+            try:
+                self.warmup.reload_snapshot(self.bin_client)
+            except Exception as e:
+                logger.warning(f"Range snapshot reload failed: {e}")
+
+    def get_bin_client(self):
+        """Get or create this process's BIN client"""
+        client = self.bin_client
+        if client is not None:
+            return client
+        with self._lock:
+            # Another thread may have created it while we waited
+            if self.bin_client is None:
+                try:
+                    self.bin_client = self.client_factory()
+                except Exception as e:
+                    logger.error(f"Failed to create BIN client: {e}")
+                    raise
+            return self.bin_client
+
+    def get_lookup_backend(self):
+        """Return the object /lookup resolves BINs through (client or micro-batcher)"""
+        if not self.config['LOOKUP_BATCHING']:
+            return self.get_bin_client()
+        backend = self.batching_lookup
+        if backend is not None:
+            return backend
+        client = self.get_bin_client()
+        with self._lock:
+            if self.batching_lookup is None:
+                self.batching_lookup = BatchingLookup(
+                    client,
+                    max_batch=self.config['LOOKUP_BATCH_SIZE'],
+                    max_delay=self.config['LOOKUP_BATCH_DELAY_MS'] / 1000
+                )
+            return self.batching_lookup
+
+    def flush_cache(self) -> Dict[str, Any]:
+        """
+        Clear the lookup cache, then re-prewarm it from the hot set in the background
+
+        Returns:
+            Dict with flushed (False without a cache) and prewarm (whether a
+            re-prewarm was started)
+        """
+        client = self.get_bin_client()
+        if client.cache is None:
+            return {'flushed': False, 'prewarm': False}
+        client.cache.clear()
+        if not self.config['HOT_SET_PATH']:
+            return {'flushed': True, 'prewarm': False}
+
+        # Write this worker's current hot set first, so the re-prewarm reflects recent traffic
+        if self.hot_set is not None:
+            try:
+                self.hot_set.persist(self.config['HOT_SET_PATH'])
+            except OSError as e:
+                logger.warning(f"Failed to persist hot set before re-prewarm: {e}")
+        threading.Thread(target=self.warmup.prewarm_hot_set, args=(client,), name='prewarm',
+                         daemon=True).start()
+        return {'flushed': True, 'prewarm': True}
+
+    def stats(self) -> Dict[str, Any]:
+        """Runtime metrics for lookup batching, upstreams and suggestions"""
+        suggester = self.warmup.range_suggester
+        return {
+            'pid': os.getpid(),
+            'batching': self.batching_lookup.stats() if self.batching_lookup is not None else None,
+            'upstreams': self.bin_client.upstreams.stats() if self.bin_client is not None else None,
+            'suggest_cache': suggester.cache_info() if suggester is not None else None,
+        }
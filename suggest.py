@@ -0,0 +1,78 @@
+"""
+Range Suggestions
+Typeahead over the sorted range bounds: ranges and issuers matching a partly typed BIN
+"""
+
+from functools import lru_cache
+from typing import Any, Dict
+
+import numpy as np
+
+from bin_index import BulkRangeResolver
+
+
+class RangeSuggester:
+    """
+    Answers "which ranges start with these digits" for as-you-type lookups
+
+    Built on BulkRangeResolver's sorted bounds: the ranges starting inside a
+    prefix are one contiguous slice found with two binary searches, and the
+    few ranges that enclose the prefix are found through the parent links.
+    Issuer counts over the slice use issuer codes stored in the same sorted
+    order, so even a 2-digit prefix spanning half the table is one bincount.
+    Answers are memoized per (prefix, limit); there are only ~111k prefixes
+    of 2-5 digits and the data only changes with a new suggester.
+    """
+
+    def __init__(self, resolver: BulkRangeResolver, generation: str = '', cache_size: int = 8192,
+                 top_issuers: int = 5):
+        self.resolver = resolver
+        self.table = resolver.table
+        self.generation = generation
+        self.top_issuers = top_issuers
+        self._issuers = self.table.dictionaries.get('issuerName', [None])
+        self._issuer_codes = resolver.codes('issuerName', resolver.rows_at(slice(None)))
+        self.suggest = lru_cache(maxsize=cache_size)(self._suggest)
+
+    def _suggest(self, prefix: str, limit: int = 10) -> Dict[str, Any]:
+        """
+        Ranges overlapping a BIN prefix and the issuers holding most of them
+
+        Args:
+            prefix: Digits typed so far
+            limit: Maximum ranges to return
+
+        Returns:
+            Dict with prefix, total (ranges overlapping the prefix), ranges
+            (enclosing ranges first, then ascending by BIN) and top issuers
+        """
+        covering, span = self.resolver.overlapping(prefix)
+        inside = max(0, span.stop - span.start)
+
+        rows = covering[:limit]
+        if len(rows) < limit:
+            stop = min(span.stop, span.start + limit - len(rows))
+            rows += self.resolver.rows_at(slice(span.start, stop)).tolist()
+
+        return {
+            'prefix': prefix,
+            'total': len(covering) + inside,
+            'ranges': [self.table.row_dict(row) for row in rows],
+            'issuers': self._top_issuers(covering, span),
+        }
+
+    def _top_issuers(self, covering, span: slice):
+        counts = np.bincount(self._issuer_codes[span], minlength=len(self._issuers))
+        if covering:
+            np.add.at(counts, self.resolver.codes('issuerName', np.array(covering)), 1)
+        counts[0] = 0  # ranges without an issuer name
+        top = min(self.top_issuers, int(np.count_nonzero(counts)))
+        if not top:
+            return []
+        codes = np.argpartition(-counts, top - 1)[:top]
+        codes = codes[np.argsort(-counts[codes], kind='stable')]
+        return [{'issuerName': self._issuers[code], 'ranges': int(counts[code])} for code in codes]
+
+    def cache_info(self) -> Dict[str, int]:
+        info = self.suggest.cache_info()
+        return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize}
@@ -0,0 +1,205 @@
+"""
+Synthetic Range Dataset
+Seeded generator for production-sized /bin-ranges data
+
+Usage:
+    python synthetic_ranges.py --count 2000000 --output data/ranges.brt
+"""
+
+import argparse
+import json
+import random
+from itertools import accumulate
+from typing import Dict, Iterator, List, Tuple
+
+from bin_ranges import BINRangeTable
+
+# Mastercard 6-digit prefixes: 510000-559999 and 222100-272099
+PREFIX_SPANS = ((222100, 272100), (510000, 560000))
+
+# Ranges given to each allocated prefix: at least enough for a parent with
+# nested sub-ranges, at most one per 2-digit block
+MIN_PER_PREFIX = 4
+MAX_PER_PREFIX = 100
+
+# (countryCode, issuerCountry, weight)
+COUNTRIES = [
+    ('US', 'United States', 30), ('GB', 'United Kingdom', 7), ('BR', 'Brazil', 6),
+    ('DE', 'Germany', 5), ('IN', 'India', 5), ('FR', 'France', 4), ('CA', 'Canada', 4),
+    ('MX', 'Mexico', 4), ('JP', 'Japan', 3), ('AU', 'Australia', 3), ('IT', 'Italy', 3),
+    ('ES', 'Spain', 3), ('PL', 'Poland', 2), ('TR', 'Turkey', 2), ('ZA', 'South Africa', 2),
+    ('NL', 'Netherlands', 2), ('SG', 'Singapore', 1), ('AE', 'United Arab Emirates', 1),
+    ('SE', 'Sweden', 1), ('NG', 'Nigeria', 1),
+]
+
+PRODUCT_TYPES = [('CREDIT', 45), ('DEBIT', 45), ('PREPAID', 10)]
+
+PRODUCT_SUB_TYPES = {
+    'CREDIT': [('STANDARD', 40), ('GOLD', 20), ('PLATINUM', 15), ('WORLD', 12),
+               ('WORLD ELITE', 5), ('BUSINESS', 8)],
+    'DEBIT': [('STANDARD', 70), ('GOLD', 10), ('PLATINUM', 5), ('BUSINESS', 15)],
+    'PREPAID': [('STANDARD', 60), ('GIFT', 25), ('PAYROLL', 15)],
+}
+
+_NAME_PARTS = (
+    ['First', 'United', 'National', 'Royal', 'Pacific', 'Atlantic', 'Northern', 'Southern',
+     'Capital', 'Metro', 'Union', 'Heritage', 'Summit', 'Pioneer', 'Citizens', 'Commerce'],
+    ['Trust', 'Savings', 'Federal', 'Credit', 'Merchant', 'Community', 'Global', 'State',
+     'Cooperative', 'Mutual', 'Investment', 'Commercial'],
+    ['Bank', 'Bank', 'Bank', 'Credit Union', 'Financial', 'Bancorp', 'Card Services'],
+)
+
+
+def _weighted(options: List[Tuple]) -> Tuple[List, List[float]]:
+    """Split (value..., weight) options into values and cumulative weights for rng.choices"""
+    values = [option[0] if len(option) == 2 else option[:-1] for option in options]
+    return values, list(accumulate(option[-1] for option in options))
+
+
+def issuer_names(count: int, seed: int = 0) -> List[str]:
+    """Distinct issuer names, deterministic for a seed"""
+    rng = random.Random(seed)
+    names, seen = [], set()
+    while len(names) < count:
+        name = ' '.join(rng.choice(part) for part in _NAME_PARTS)
+        if name in seen:
+            name = f"{name} {len(names)}"
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+class SyntheticRangeGenerator:
+    """
+    Produces sorted, realistic account ranges for load and scale testing
+
+    count // MIN_PER_PREFIX prefixes are allocated (every prefix for large
+    counts) and share exactly `count` ranges, so split and nested prefixes
+    appear at any size. Each allocated 6-digit prefix belongs to one issuer,
+    drawn from a Zipf distribution so a few large issuers hold most of the
+    space. A prefix is either split into non-overlapping 8-digit ranges (with
+    gaps) or is a 6-digit parent with 8-digit sub-ranges nested inside it
+    that override it. Issuers keep one home country; product types follow
+    COUNTRIES/PRODUCT_TYPES weights. The same seed always gives the same data.
+    """
+
+    def __init__(self, count: int, seed: int = 0, issuers: int = None, zipf_s: float = 1.1,
+                 nested_fraction: float = 0.2):
+        capacity = MAX_PER_PREFIX * sum(stop - start for start, stop in PREFIX_SPANS)
+        if not 0 < count <= capacity:
+            raise ValueError(f"count must be between 1 and {capacity}")
+        self.count = count
+        self.seed = seed
+        self.nested_fraction = nested_fraction
+
+        rng = random.Random(seed)
+        issuer_count = issuers or max(10, min(20000, count // 100))
+        self.issuers = issuer_names(issuer_count, seed)
+        self._issuer_weights = list(accumulate(1 / rank ** zipf_s for rank in range(1, issuer_count + 1)))
+        countries, country_weights = _weighted(COUNTRIES)
+        self.issuer_countries = rng.choices(countries, cum_weights=country_weights, k=issuer_count)
+        self._products = _weighted(PRODUCT_TYPES)
+        self._sub_types = {product: _weighted(options) for product, options in PRODUCT_SUB_TYPES.items()}
+
+    def _record(self, rng: random.Random, low: str, high: str, issuer: int) -> Dict[str, str]:
+        country_code, issuer_country = self.issuer_countries[issuer]
+        products, product_weights = self._products
+        product_type = rng.choices(products, cum_weights=product_weights)[0]
+        sub_types, sub_type_weights = self._sub_types[product_type]
+        return {
+            'lowAccountRange': low,
+            'highAccountRange': high,
+            'issuerName': self.issuers[issuer],
+            'countryCode': country_code,
+            'productType': product_type,
+            'cardType': 'MASTERCARD',
+            'issuerCountry': issuer_country,
+            'productSubType': rng.choices(sub_types, cum_weights=sub_type_weights)[0],
+        }
+
+    @staticmethod
+    def _blocks(rng: random.Random, count: int) -> List[Tuple[int, int]]:
+        """`count` non-overlapping runs of 2-digit blocks within 00-99, some with gaps after them"""
+        starts = sorted(rng.sample(range(100), count))
+        runs = []
+        for start, next_start in zip(starts, starts[1:] + [100]):
+            end = next_start - 1 if rng.random() < 0.7 else rng.randint(start, next_start - 1)
+            runs.append((start, end))
+        return runs
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        rng = random.Random(self.seed)
+        prefixes = [prefix for start, stop in PREFIX_SPANS for prefix in range(start, stop)]
+        # Fewer prefixes with several ranges each, rather than one range in
+        # a few of them; the counts add up to exactly self.count
+        used = max(1, min(len(prefixes), self.count // MIN_PER_PREFIX))
+        prefixes = sorted(rng.sample(prefixes, used))
+        per_prefix, extra = divmod(self.count, used)
+        larger = set(rng.sample(range(used), extra))
+        issuer_ranks = range(len(self.issuers))
+
+        for index, prefix in enumerate(prefixes):
+            n = per_prefix + (index in larger)
+            issuer = rng.choices(issuer_ranks, cum_weights=self._issuer_weights)[0]
+            p = str(prefix)
+
+            if n == 1:
+                yield self._record(rng, f"{p}0000000000", f"{p}9999999999", issuer)
+                continue
+            nested = rng.random() < self.nested_fraction
+            if nested:
+                yield self._record(rng, f"{p}0000000000", f"{p}9999999999", issuer)
+            for start, end in self._blocks(rng, n - 1 if nested else n):
+                # Sub-ranges usually stay with the prefix's issuer
+                owner = issuer if rng.random() < 0.85 else \
+                    rng.choices(issuer_ranks, cum_weights=self._issuer_weights)[0]
+                yield self._record(rng, f"{p}{start:02d}00000000", f"{p}{end:02d}99999999", owner)
+
+
+def write_dataset(ranges, path: str) -> int:
+    """
+    Write ranges to path: .brt as a columnar snapshot, .ndjson/.jsonl one per
+    line, anything else as a JSON array
+
+    Returns:
+        Number of ranges written
+    """
+    if path.endswith('.brt'):
+        table = BINRangeTable(ranges)
+        table.save(path)
+        return len(table)
+
+    written = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        if path.endswith(('.ndjson', '.jsonl')):
+            for range_data in ranges:
+                f.write(json.dumps(range_data, separators=(',', ':')) + '\n')
+                written += 1
+        else:
+            f.write('[')
+            for range_data in ranges:
+                f.write((',\n' if written else '\n') + json.dumps(range_data, separators=(',', ':')))
+                written += 1
+            f.write('\n]\n')
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--count', type=int, default=1000000, help='number of ranges')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--issuers', type=int, help='issuer pool size (default count/100)')
+    parser.add_argument('--zipf', type=float, default=1.1, help='Zipf exponent for issuer sizes')
+    parser.add_argument('--nested-fraction', type=float, default=0.2,
+                        help='share of split prefixes that keep a 6-digit parent range')
+    parser.add_argument('--output', required=True, help='.brt, .ndjson/.jsonl or .json file')
+    args = parser.parse_args()
+
+    generator = SyntheticRangeGenerator(args.count, seed=args.seed, issuers=args.issuers,
+                                        zipf_s=args.zipf, nested_fraction=args.nested_fraction)
+    written = write_dataset(generator, args.output)
+    print(f"Wrote {written} ranges to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+import pytest
+
+from bin_cache import RangeCache, SharedMemoryCache
+
+
+def result(low, high, issuer):
+    return {'lowAccountRange': low, 'highAccountRange': high, 'issuerName': issuer}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    tier = SharedMemoryCache(str(tmp_path / 'cache'), slots=256, ttl=60)
+    yield RangeCache(tier)
+    tier.close()
+
+
+def test_six_digit_range_answers_shorter_prefixes(cache):
+    cache.set('54545412', result('5454540000000000', '5454549999999999', 'Parent'))
+    for bin_number in ('54545412', '5454541', '545454'):
+        assert cache.get(bin_number)['issuerName'] == 'Parent'
+    assert cache.get('54545499') is None
+
+
+def test_nested_sub_range_answers_only_its_own_blocks(cache):
+    cache.set('54545412', result('5454541200000000', '5454541299999999', 'Child'))
+    assert cache.get('54545412')['issuerName'] == 'Child'
+    assert cache.get('5454541') is None
+    assert cache.get('545454') is None
@@ -0,0 +1,56 @@
+import random
+
+import numpy as np
+
+from bin_index import BINRangeResolver, BulkRangeResolver
+from bin_ranges import BINRangeTable
+from synthetic_ranges import SyntheticRangeGenerator
+
+
+def narrowest(table, bin_number):
+    """Brute force: the narrowest range covering every account number with this prefix"""
+    best = None
+    for record in table:
+        if record.contains(bin_number) and (
+                best is None or (record.high - record.low + 1) * 10 ** (19 - record.length)
+                < (best.high - best.low + 1) * 10 ** (19 - best.length)):
+            best = record
+    return best
+
+
+def sample_bins(table, count, seed=0):
+    rng = random.Random(seed)
+    bins = [table[rng.randrange(len(table))].low_account_range[:rng.choice((6, 7, 8))] for _ in range(count)]
+    return bins + [str(rng.randrange(10 ** 8)).zfill(8) for _ in range(count)]
+
+
+def test_resolvers_match_brute_force():
+    ranges = list(SyntheticRangeGenerator(500, seed=3))
+    ranges.append({'lowAccountRange': '5123450000000000', 'highAccountRange': '5123457349999999',
+                   'issuerName': 'Unaligned'})
+    table = BINRangeTable(ranges)
+    trie = BINRangeResolver(table)
+    bulk = BulkRangeResolver(table)
+    for bin_number in sample_bins(table, 150) + ['512345', '5123457', '51234573', '51234574']:
+        expected = narrowest(table, bin_number)
+        assert trie.resolve(bin_number) == expected
+        assert bulk.resolve_one(bin_number) == expected
+
+
+def test_add_range_matches_bulk_build():
+    ranges = list(SyntheticRangeGenerator(1000, seed=4))
+    built = BINRangeResolver(ranges)
+    grown = BINRangeResolver(ranges[:100])
+    for range_data in ranges[100:]:
+        grown.add_range(range_data)
+    for bin_number in sample_bins(built.table, 500, seed=1):
+        assert grown.resolve(bin_number) == built.resolve(bin_number)
+
+
+def test_memory_usage_includes_table_and_widths():
+    table = BINRangeTable(SyntheticRangeGenerator(1000, seed=5))
+    usage = BINRangeResolver(table).memory_usage()
+    assert usage['table_bytes'] == table.memory_usage()['total_bytes']
+    assert usage['width_bytes'] == 8 * len(table)
+    assert usage['total_bytes'] == usage['trie_bytes'] + usage['width_bytes'] + usage['table_bytes']
+    assert np.all(np.frombuffer(BINRangeResolver(table)._node_range, dtype=np.int32) < len(table))
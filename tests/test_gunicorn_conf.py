@@ -0,0 +1,117 @@
+import json
+import logging
+import os
+import runpy
+import signal
+import types
+
+import pytest
+from gunicorn.config import Config
+
+from admission import AdmissionControl
+
+CONF_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'gunicorn.conf.py')
+
+
+@pytest.fixture
+def conf(monkeypatch):
+    """gunicorn.conf.py's settings and hooks; it sets WORKER_INIT=post_fork for create_app"""
+    monkeypatch.setenv('WORKER_INIT', 'post_fork')
+    monkeypatch.delenv('GUNICORN_THREADS', raising=False)
+    return runpy.run_path(CONF_PATH)
+
+
+@pytest.fixture
+def app(conf):
+    from app import create_app
+    return create_app({'WARMUP_ON_BOOT': False})
+
+
+def fake_server(app, threads):
+    cfg = Config()
+    cfg.set('threads', threads)
+    return types.SimpleNamespace(app=types.SimpleNamespace(wsgi=lambda: app), cfg=cfg,
+                                 log=logging.getLogger('gunicorn.error'))
+
+
+def test_thread_demand_counts_limits_and_queues_of_limited_routes():
+    admission = AdmissionControl(limits={'lookup_bin': 16}, default_limit=8, max_queue=10)
+    assert admission.thread_demand(['lookup_bin', 'index', 'health_check', 'metrics', 'index']) == 26 + 18
+
+
+def test_unset_thread_count_is_sized_above_admission_demand(conf, app):
+    server = fake_server(app, conf['threads'])
+    conf['on_starting'](server)
+    admission = app.extensions['admission_control']
+    demand = admission.thread_demand(rule.endpoint for rule in app.url_map.iter_rules())
+    assert demand > 16 + 4 + 4 + 2
+    assert server.cfg.threads == demand + conf['THREAD_HEADROOM']
+
+
+def test_low_thread_count_warns(conf, app, caplog):
+    server = fake_server(app, 32)
+    with caplog.at_level(logging.WARNING, logger='gunicorn.error'):
+        conf['on_starting'](server)
+    assert server.cfg.threads == 32
+    assert 'GUNICORN_THREADS=32' in caplog.text
+
+
+def worker_report(conf, worker, inherited) -> dict:
+    """What a forked worker sees after post_worker_init, compared with the state it inherited"""
+    services = worker.wsgi.extensions['bin_lookup']
+    conf['post_worker_init'](worker)
+    client = services.get_bin_client()
+    return {
+        'pid': os.getpid(),
+        'worker_pid': services._worker_pid,
+        'fresh_client': client is not inherited['client'],
+        'fresh_pool': client.session.get_adapter('https://').poolmanager
+        is not inherited['pool'],
+        'fresh_lock': services._lock is not inherited['lock'],
+        'lock_free': not services._lock.locked(),
+    }
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_post_worker_init_gives_each_forked_worker_its_own_client(conf):
+    from app import create_app
+    from bin_lookup_client import BINLookupClient
+
+    app = create_app({
+        'WARMUP_ON_BOOT': False,
+        'BIN_CLIENT_FACTORY': lambda: BINLookupClient(None, base_url='http://127.0.0.1:9'),
+    })
+    services = app.extensions['bin_lookup']
+    worker = types.SimpleNamespace(wsgi=app)
+
+    # State a worker would inherit: a client built in the master, and a lock held at fork time
+    client = services.get_bin_client()
+    inherited = {'client': client, 'pool': client.session.get_adapter('https://').poolmanager,
+                 'lock': services._lock}
+    reports = []
+    with services._lock:
+        for _ in range(2):
+            read_fd, write_fd = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                status = 1
+                try:
+                    # An inherited lock that was never replaced would hang the worker
+                    signal.alarm(10)
+                    os.close(read_fd)
+                    os.write(write_fd, json.dumps(worker_report(conf, worker, inherited)).encode())
+                    status = 0
+                finally:
+                    os._exit(status)
+            os.close(write_fd)
+            with os.fdopen(read_fd, 'rb') as pipe:
+                reports.append((pid, pipe.read()))
+            assert os.waitpid(pid, 0)[1] == 0
+
+    for pid, raw in reports:
+        report = json.loads(raw)
+        assert report == {'pid': pid, 'worker_pid': pid, 'fresh_client': True, 'fresh_pool': True,
+                          'fresh_lock': True, 'lock_free': True}
+    # The master's own state is untouched
+    assert services.get_bin_client() is client
+    assert services._worker_pid is None
@@ -0,0 +1,30 @@
+import pytest
+
+from bin_index import BulkRangeResolver
+from bin_ranges import BINRangeTable
+from synthetic_ranges import SyntheticRangeGenerator
+
+
+@pytest.mark.parametrize('count', [3, 500, 20000])
+def test_emits_exactly_count_sorted_ranges(count):
+    records = list(SyntheticRangeGenerator(count, seed=1))
+    assert len(records) == count
+    keys = [(record['lowAccountRange'], record['highAccountRange']) for record in records]
+    assert [low for low, _ in keys] == sorted(low for low, _ in keys)
+
+
+def test_default_loadtest_size_has_nested_ranges():
+    table = BINRangeTable(SyntheticRangeGenerator(20000))
+    parents = sum(1 for record in table if record.high - record.low == 10 ** 10 - 1)
+    assert len(table) == 20000
+    assert parents > 100
+    assert BulkRangeResolver(table).max_depth >= 1
+
+
+def test_same_seed_same_data():
+    assert list(SyntheticRangeGenerator(1000, seed=7)) == list(SyntheticRangeGenerator(1000, seed=7))
+
+
+def test_count_beyond_prefix_space_is_rejected():
+    with pytest.raises(ValueError):
+        SyntheticRangeGenerator(10 ** 8)
@@ -0,0 +1,64 @@
+import pytest
+
+import upstreams
+from upstreams import UpstreamPool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(upstreams, 'time', fake)
+    return fake
+
+
+def serve(pool, picks, latency=0.02):
+    """Route `picks` requests, all succeeding in `latency` seconds; returns picks per URL"""
+    counts = {upstream.url: 0 for upstream in pool.upstreams}
+    for _ in range(picks):
+        upstream = pool.select()
+        pool.record_success(upstream, latency)
+        counts[upstream.url] += 1
+    return counts
+
+
+@pytest.mark.parametrize('failure_latency', [30.0, 0.001])
+def test_ejected_upstream_is_probed_and_picked_again(clock, failure_latency):
+    pool = UpstreamPool(['http://a', 'http://b', 'http://c'], eject_after=3, eject_seconds=5)
+    serve(pool, 300)
+    flaky = pool.upstreams[2]
+    for _ in range(3):
+        pool.select()
+        pool.record_failure(flaky, failure_latency)
+    assert not flaky.available(clock.now)
+    assert serve(pool, 1000)['http://c'] == 0
+
+    clock.now += 5
+    assert pool.select() is flaky
+    pool.record_success(flaky, 0.02)
+    assert flaky.latency < 1.0
+
+    counts = serve(pool, 10000)
+    assert counts['http://c'] > 2000
+
+
+def test_failed_probe_ejects_again_for_longer(clock):
+    pool = UpstreamPool(['http://a', 'http://b'], eject_after=3, eject_seconds=5)
+    flaky = pool.upstreams[1]
+    for _ in range(3):
+        pool.select(exclude=[pool.upstreams[0]])
+        pool.record_failure(flaky, 30.0)
+
+    clock.now += 5
+    assert pool.select() is flaky
+    pool.record_failure(flaky, 30.0)
+    assert flaky.ejections == 2
+    assert flaky.ejected_until == clock.now + 10
+    assert pool.select() is pool.upstreams[0]
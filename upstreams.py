@@ -0,0 +1,149 @@
+"""
+Upstream Selection
+Latency-aware routing across several API endpoints with automatic ejection
+"""
+
+import random
+import statistics
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+
+class Upstream:
+    """One API base URL with moving latency and error-rate estimates"""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip('/')
+        self.latency = 0.0
+        self.error_rate = 0.0
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        # Set on ejection: the first request after it ends goes here as a probe
+        self.probe_due = False
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def cost(self, error_penalty: float) -> float:
+        # Unmeasured upstreams cost nothing, so new and re-admitted nodes get traffic
+        return self.latency * (self.in_flight + 1) + self.error_rate * error_penalty
+
+    def stats(self, now: float) -> Dict:
+        return {
+            'url': self.url,
+            'available': self.available(now),
+            'latency_ms': round(self.latency * 1000, 3),
+            'error_rate': round(self.error_rate, 4),
+            'in_flight': self.in_flight,
+            'requests': self.requests,
+            'failures': self.failures,
+            'ejections': self.ejections,
+            'ejected_for_s': round(max(0.0, self.ejected_until - now), 3),
+        }
+
+
+class UpstreamPool:
+    """
+    Picks an upstream per request using power-of-two-choices
+
+    Two available upstreams are sampled and the one with the lower cost
+    (EWMA latency scaled by in-flight requests, plus an error-rate penalty)
+    wins. After `eject_after` consecutive failures an upstream is ejected for
+    `eject_seconds`, doubling on each repeat up to `max_eject_seconds`. Once
+    that passes, the next request is sent to it as a probe rather than left
+    to a cost comparison it would lose on its failure-inflated error rate.
+    A successful probe re-admits it with the pool's median error rate; a
+    failed one ejects it again. Failures never feed the latency estimate, so
+    a timeout does not price a node out once it recovers. If every upstream
+    is ejected, the one due back soonest is used rather than failing outright.
+    """
+
+    def __init__(self, urls: Sequence[str], alpha: float = 0.3, eject_after: int = 3,
+                 eject_seconds: float = 5, max_eject_seconds: float = 60,
+                 error_penalty: float = 1.0):
+        if not urls:
+            raise ValueError("At least one upstream URL is required")
+        self.upstreams = [Upstream(url) for url in urls]
+        self.alpha = alpha
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.max_eject_seconds = max_eject_seconds
+        self.error_penalty = error_penalty
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.upstreams)
+
+    @property
+    def primary(self) -> Upstream:
+        return self.upstreams[0]
+
+    def select(self, exclude: Sequence[Upstream] = ()) -> Upstream:
+        """Choose an upstream and count the request as in flight on it"""
+        now = time.monotonic()
+        with self._lock:
+            candidates = [u for u in self.upstreams if u not in exclude] or self.upstreams
+            available = [u for u in candidates if u.available(now)]
+            probe = next((u for u in available if u.probe_due), None)
+            if probe is not None:
+                probe.probe_due = False
+                chosen = probe
+            elif not available:
+                chosen = min(candidates, key=lambda u: u.ejected_until)
+            elif len(available) == 1:
+                chosen = available[0]
+            else:
+                first, second = random.sample(available, 2)
+                chosen = min(first, second, key=lambda u: u.cost(self.error_penalty))
+            chosen.in_flight += 1
+            chosen.requests += 1
+            return chosen
+
+    def release(self, upstream: Upstream) -> None:
+        """End a request that never reached the upstream, without scoring it"""
+        with self._lock:
+            upstream.in_flight -= 1
+
+    def record_success(self, upstream: Upstream, latency: float) -> None:
+        with self._lock:
+            upstream.in_flight -= 1
+            upstream.latency = latency if upstream.latency == 0 else (
+                self.alpha * latency + (1 - self.alpha) * upstream.latency)
+            if upstream.ejections:
+                # Back from ejection: start from where its peers are, not its failure history
+                peers = [u.error_rate for u in self.upstreams if u is not upstream]
+                upstream.error_rate = statistics.median(peers) if peers else 0.0
+            else:
+                upstream.error_rate *= 1 - self.alpha
+            upstream.consecutive_failures = 0
+            upstream.ejections = 0
+
+    def record_failure(self, upstream: Upstream, latency: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            upstream.in_flight -= 1
+            upstream.failures += 1
+            upstream.consecutive_failures += 1
+            upstream.error_rate = self.alpha + (1 - self.alpha) * upstream.error_rate
+            # latency is deliberately not folded in: a timeout says nothing about healthy speed
+            if upstream.consecutive_failures >= self.eject_after and upstream.available(now):
+                upstream.ejections += 1
+                duration = min(self.eject_seconds * 2 ** (upstream.ejections - 1),
+                               self.max_eject_seconds)
+                upstream.ejected_until = now + duration
+                upstream.probe_due = True
+
+    def stats(self) -> List[Dict]:
+        now = time.monotonic()
+        with self._lock:
+            return [upstream.stats(now) for upstream in self.upstreams]
+
+
+def parse_upstreams(value: Optional[str]) -> List[str]:
+    """Split a comma-separated MASTERCARD_BASE_URLS value"""
+    return [url.strip() for url in (value or '').split(',') if url.strip()]
@@ -0,0 +1,247 @@
+"""
+Application Warm-up
+Eager initialization of credentials, pooled connections and range indexes at boot
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Records the wall-clock cost of named startup phases"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block (imports, client creation, ...) under `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - start) * 1000, 3)
+
+    def report(self) -> Dict:
+        """Phase durations and total time since the timer was created, in milliseconds"""
+        return {
+            'phases_ms': dict(self.phases),
+            'since_boot_ms': round((time.perf_counter() - self.started) * 1000, 3),
+        }
+
+
+class Warmup:
+    """
+    Runs the boot-time warm-up once and tracks readiness
+
+    Steps, each timed on the startup timer:
+      1. load_credentials - create the client, which parses the P12 key
+      2. warm_signer      - sign a throwaway request to initialize the RSA path
+      3. open_connections - pre-open pooled TLS connections to the API host
+      4. load_snapshot    - build range indexes from a local snapshot, if configured
+                            (and the coverage bitmap, when a bitmap path is set)
+      5. prewarm_hot_set  - pre-fetch persisted hot BINs into the cache, if configured
+
+    Credential failures leave the app unready; connection, snapshot and
+    pre-warm failures are logged and warm-up still completes.
+    """
+
+    def __init__(self, client_factory: Callable, connections: int = 4,
+                 snapshot_path: Optional[str] = None, timer: StartupTimer = None,
+                 hot_set_path: Optional[str] = None, prewarm_rate: float = 20,
+                 prewarm_seconds: float = 30, coverage_path: Optional[str] = None):
+        self.client_factory = client_factory
+        self.connections = connections
+        self.snapshot_path = snapshot_path
+        self.hot_set_path = hot_set_path
+        self.coverage_path = coverage_path
+        self.prewarm_rate = prewarm_rate
+        self.prewarm_seconds = prewarm_seconds
+        self.timer = timer or StartupTimer()
+
+        self.started = False
+        self.ready = False
+        self.error: Optional[str] = None
+        self.connections_opened = 0
+        self.range_table = None
+        self.snapshot_generation: Optional[str] = None
+        self.range_resolver = None
+        self.range_suggester = None
+        self.range_stats = None
+        self.coverage = None
+        self.prewarm_summary = None
+        self._lock = threading.Lock()
+
+    def run(self) -> bool:
+        """Run every warm-up step in the calling thread; returns readiness"""
+        with self._lock:
+            if self.ready:
+                return True
+            self.started = True
+            self.error = None
+
+            try:
+                with self.timer.phase('load_credentials'):
+                    client = self.client_factory()
+                with self.timer.phase('warm_signer'):
+                    client.auth.get_authorization_header('GET', f"{client.base_url}/bin-ranges")
+            except Exception as e:
+                self.error = str(e)
+                logger.error(f"Warm-up failed: {e}")
+                return False
+
+            with self.timer.phase('open_connections'):
+                self.connections_opened = client.warm_connections(self.connections)
+            if self.connections_opened < min(self.connections, client.pool_size):
+                logger.warning(f"Warm-up opened {self.connections_opened} of "
+                               f"{self.connections} pooled connections")
+
+            # Normally already loaded before fork, so workers share the pages
+            if self.range_table is None:
+                self.load_snapshot()
+            self.attach_indexes(client)
+
+            if self.hot_set_path and client.cache is not None:
+                with self.timer.phase('prewarm_hot_set'):
+                    self.prewarm_hot_set(client)
+
+            self.ready = True
+            logger.info(f"Warm-up complete: {self.timer.report()}")
+            return True
+
+    def load_snapshot(self) -> bool:
+        """Build range indexes from the snapshot, if configured; failures are logged"""
+        if not self.snapshot_path:
+            return False
+        # Imported here so apps that never configure a snapshot skip the cost
+        from bin_index import BulkRangeResolver
+        from bin_ranges import load_range_snapshot
+        from range_stats import RangeStats
+        from suggest import RangeSuggester
+
+        try:
+            with self.timer.phase('load_snapshot'):
+                generation = str(int(os.path.getmtime(self.snapshot_path)))
+                table = load_range_snapshot(self.snapshot_path)
+                # One array-backed index serves the range cache and /suggest; it
+                # builds in about a second per million ranges, unlike a Python trie
+                self.range_resolver = BulkRangeResolver(table)
+                self.range_suggester = RangeSuggester(self.range_resolver, generation=generation)
+                # Recounted in place on reload, so /stats never sees a missing aggregate
+                if self.range_stats is None:
+                    self.range_stats = RangeStats(table, generation=generation)
+                else:
+                    self.range_stats.replace(table, generation=generation)
+                self.range_table = table
+                self.snapshot_generation = generation
+        except Exception as e:
+            logger.warning(f"Failed to load range snapshot {self.snapshot_path}: {e}")
+            return False
+        self.load_coverage()
+        return True
+
+    def reload_snapshot(self, client=None) -> bool:
+        """
+        Load the snapshot again if its file changed since the last load
+
+        Args:
+            client: BIN client whose range cache index and coverage bitmap to
+                    point at the new snapshot, if any
+
+        Returns:
+            Whether a new snapshot was loaded
+        """
+        if not self.snapshot_path:
+            return False
+        try:
+            generation = str(int(os.path.getmtime(self.snapshot_path)))
+        except OSError as e:
+            logger.warning(f"Failed to check range snapshot {self.snapshot_path}: {e}")
+            return False
+        if generation == self.snapshot_generation or not self.load_snapshot():
+            return False
+        logger.info(f"Reloaded range snapshot {self.snapshot_path} ({len(self.range_table)} ranges)")
+        if client is not None:
+            self.attach_indexes(client)
+        return True
+
+    def attach_indexes(self, client) -> None:
+        """Point the client's range cache and coverage check at the loaded snapshot"""
+        # A range-granular cache can map any BIN to its range via the index
+        if self.range_resolver is not None and hasattr(client.cache, 'set_index'):
+            client.cache.set_index(self.range_resolver, generation=self.snapshot_generation)
+        # Lets the client reject BINs no range covers before any network call
+        if self.coverage is not None:
+            client.coverage = self.coverage
+
+    def load_coverage(self) -> bool:
+        """
+        Map the coverage bitmap, rebuilding it from the range table when it is
+        missing or older than the snapshot; failures are logged
+        """
+        if not self.coverage_path:
+            return False
+        from bin_index import CoverageBitmap
+
+        try:
+            with self.timer.phase('load_coverage'):
+                if self.range_table is not None and not self._coverage_current():
+                    CoverageBitmap.from_table(self.range_table).save(self.coverage_path)
+                self.coverage = CoverageBitmap.load(self.coverage_path)
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to load coverage bitmap {self.coverage_path}: {e}")
+            return False
+
+    def _coverage_current(self) -> bool:
+        try:
+            return os.path.getmtime(self.coverage_path) >= os.path.getmtime(self.snapshot_path)
+        except OSError:
+            return False
+
+    def reset(self) -> None:
+        """Forget per-process readiness after a fork; loaded range indexes are kept"""
+        self._lock = threading.Lock()
+        self.started = False
+        self.ready = False
+        self.error = None
+        self.connections_opened = 0
+        self.prewarm_summary = None
+
+    def prewarm_hot_set(self, client) -> Optional[Dict]:
+        """Pre-fetch the persisted hot set; also useful right after a cache flush"""
+        from hot_set import prewarm_hot_set
+
+        try:
+            self.prewarm_summary = prewarm_hot_set(client, self.hot_set_path, rate=self.prewarm_rate,
+                                                   max_seconds=self.prewarm_seconds)
+            logger.info(f"Hot-set pre-warm: {self.prewarm_summary}")
+        except Exception as e:
+            logger.warning(f"Hot-set pre-warm failed: {e}")
+        return self.prewarm_summary
+
+    def start(self) -> threading.Thread:
+        """Run warm-up in a background thread so the server can bind immediately"""
+        self.started = True
+        thread = threading.Thread(target=self.run, name='warmup', daemon=True)
+        thread.start()
+        return thread
+
+    def status(self) -> Dict:
+        """Readiness details for the health endpoint"""
+        return {
+            'ready': self.ready,
+            'error': self.error,
+            'connections_opened': self.connections_opened,
+            'snapshot_ranges': len(self.range_table) if self.range_table is not None else 0,
+            'coverage': self.coverage.stats() if self.coverage is not None else None,
+            'prewarm': self.prewarm_summary,
+            'startup': self.timer.report(),
+        }